@@ -0,0 +1,244 @@
+# File: AutoTune.py
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+
+from main import batch_simulate
+
+# Cost settings
+OVERSHOOT_WEIGHT = 10.0  # Cost added per % of overshoot
+
+# Search settings
+CHUNK_SIZE = 4096  # Most gain sets per job sent to a worker process (bounds memory)
+REFINE_ROUNDS = 6
+REFINE_SAMPLES = 2000  # Candidates per refining round
+REFINE_SHRINK = 0.5  # The search box shrinks by this factor every round
+
+# Relay test settings
+RELAY_AMPLITUDE = 10.0  # Control output of the relay (+/-)
+RELAY_STEPS = 400
+
+def ise_overshoot_cost(result, overshoot_weight=OVERSHOOT_WEIGHT):
+    """ISE plus a penalty per % of overshoot. Runs that blew up cost infinity."""
+    cost = result["ise"] + overshoot_weight * result["overshoot"]
+    return np.where(np.isfinite(cost), cost, np.inf)
+
+def _evaluate_chunk(job):
+    """Worker: simulate one chunk of gain sets and return their costs."""
+    kp, ki, kd, setpoint, dt, steps, plant, cost = job
+    with np.errstate(all="ignore"):  # Unstable gains overflow; their cost becomes inf
+        result = batch_simulate(kp, ki, kd, setpoint, dt, steps=steps, keep_traces=False, plant=plant)
+        return cost(result)
+
+class AutoTuner:
+    """
+    Searches PID gain space for the process simulated by batch_simulate(),
+    or for plant (a model from Plants.py) when one is given.
+
+    Candidates are scored by a cost function of the batch metrics (by default
+    ISE plus an overshoot penalty) and evaluated in chunks across a process
+    pool, each chunk as one vectorized batch. Three searches are available:
+    grid_search() over given gain values, ziegler_nichols() from a relay
+    experiment (relay_identify()), and refine(), which keeps sampling a
+    shrinking box around the best gains found so far. tune() runs all three
+    on a single process pool.
+
+    With more than one worker, cost is sent to the worker processes, so it
+    must be picklable: a module-level function or a functools.partial of
+    one. A lambda or nested function works with workers=1 but fails as soon
+    as the pool is used.
+    """
+    def __init__(self, setpoint=100, dt=0.1, steps=100, cost=ise_overshoot_cost, workers=None,
+                 chunk_size=CHUNK_SIZE, plant=None):
+        self.setpoint = setpoint
+        self.dt = dt
+        self.steps = steps
+        self.plant = plant
+        self.cost = cost
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self._pool = None
+
+    @contextmanager
+    def worker_pool(self):
+        """
+        Keep one process pool open for every evaluate() inside the with block
+        (tune() uses this so its searches don't each start their own pool).
+        """
+        if self._pool is not None or self.workers == 1:
+            yield
+            return
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            self._pool = pool
+            try:
+                yield
+            finally:
+                self._pool = None
+
+    def evaluate(self, kp, ki, kd):
+        """
+        Cost of each gain set (kp, ki, kd are equal-length arrays). The batch
+        is split evenly across the workers, in chunks of at most chunk_size.
+        """
+        kp, ki, kd = (np.asarray(v, dtype=float).ravel() for v in (kp, ki, kd))
+        size = min(self.chunk_size, max(1, math.ceil(kp.size / self.workers)))
+        jobs = [(kp[i:i + size], ki[i:i + size], kd[i:i + size],
+                 self.setpoint, self.dt, self.steps, self.plant, self.cost)
+                for i in range(0, kp.size, size)]
+        if self.workers == 1 or len(jobs) == 1:
+            costs = [_evaluate_chunk(job) for job in jobs]
+        elif self._pool is not None:
+            costs = list(self._pool.map(_evaluate_chunk, jobs))
+        else:
+            with self.worker_pool():
+                costs = list(self._pool.map(_evaluate_chunk, jobs))
+        return np.concatenate(costs) if costs else np.zeros(0)
+
+    def rank(self, kp, ki, kd, costs, top=10):
+        """The top distinct gain sets, cheapest first, as dicts with cost, kp, ki and kd."""
+        ranked = []
+        seen = set()
+        for i in np.argsort(costs, kind="stable"):
+            gains = (float(kp[i]), float(ki[i]), float(kd[i]))
+            if gains in seen:
+                continue
+            seen.add(gains)
+            ranked.append({"cost": float(costs[i]), "kp": gains[0], "ki": gains[1], "kd": gains[2]})
+            if len(ranked) == top:
+                break
+        return ranked
+
+    def grid_search(self, kp_values, ki_values, kd_values, top=10):
+        """Evaluate every combination of the given gain values."""
+        kp, ki, kd = (grid.ravel() for grid in np.meshgrid(kp_values, ki_values, kd_values, indexing="ij"))
+        return self.rank(kp, ki, kd, self.evaluate(kp, ki, kd), top)
+
+    def relay_identify(self, amplitude=RELAY_AMPLITUDE, steps=RELAY_STEPS, bias=0.0):
+        """
+        Relay (Astrom-Hagglund) experiment: drive the process with
+        bias +/- amplitude depending on the sign of the error and measure the
+        oscillation it settles into. Returns the ultimate gain Ku and period Tu.
+        A plant that settles (unlike the default integrator) needs a bias near
+        the control output that holds it at the setpoint.
+        """
+        pv = 0.0
+        if self.plant is not None:
+            discrete_plant = self.plant.discretize(self.dt)
+            state = discrete_plant.reset(1)
+        history = []
+        for _ in range(steps):
+            control = bias + (amplitude if self.setpoint - pv > 0 else -amplitude)
+            if self.plant is None:
+                pv += control * self.dt  # Same process as batch_simulate
+            else:
+                state = discrete_plant.step(state, np.array([control]))
+                pv = float(discrete_plant.output(state)[0])
+            history.append(pv - self.setpoint)
+        tail = np.array(history[steps // 2:])  # Skip the approach to the setpoint
+        oscillation = (tail.max() - tail.min()) / 2
+        crossings = np.nonzero(np.diff(np.sign(tail)) > 0)[0]  # Upward zero crossings
+        if oscillation <= 0 or len(crossings) < 2:
+            raise ValueError("The relay experiment did not produce an oscillation")
+        period = (crossings[-1] - crossings[0]) / (len(crossings) - 1) * self.dt
+        return float(4 * amplitude / (math.pi * oscillation)), float(period)
+
+    def ziegler_nichols(self, amplitude=RELAY_AMPLITUDE, bias=0.0):
+        """Classic Ziegler-Nichols PID gains from a relay experiment."""
+        ku, tu = self.relay_identify(amplitude, bias=bias)
+        kp = 0.6 * ku
+        return {"kp": kp, "ki": 2 * kp / tu, "kd": kp * tu / 8}
+
+    def refine(self, start, spread=None, rounds=REFINE_ROUNDS, samples=REFINE_SAMPLES, shrink=REFINE_SHRINK,
+               top=10, seed=None):
+        """
+        Random search in a box around start (a dict with kp, ki, kd) that
+        re-centers on the best candidate and shrinks every round. spread is
+        the initial half-width per gain (default: the gains themselves).
+        """
+        rng = np.random.default_rng(seed)
+        best = np.array([start["kp"], start["ki"], start["kd"]], dtype=float)
+        width = np.abs(best) if spread is None else np.array([spread["kp"], spread["ki"], spread["kd"]], dtype=float)
+        width = np.where(width > 0, width, 0.1)
+        kp_all, ki_all, kd_all, cost_all = [], [], [], []
+        for _ in range(rounds):
+            candidates = best + rng.uniform(-1, 1, size=(samples, 3)) * width
+            candidates = np.vstack([best, np.maximum(candidates, 0)])  # Gains stay non-negative
+            costs = self.evaluate(candidates[:, 0], candidates[:, 1], candidates[:, 2])
+            best = candidates[np.argmin(costs)]
+            width *= shrink
+            kp_all.append(candidates[:, 0])
+            ki_all.append(candidates[:, 1])
+            kd_all.append(candidates[:, 2])
+            cost_all.append(costs)
+        return self.rank(np.concatenate(kp_all), np.concatenate(ki_all), np.concatenate(kd_all),
+                         np.concatenate(cost_all), top)
+
+    def tune(self, kp_values=None, ki_values=None, kd_values=None, top=10, seed=None):
+        """Grid search plus the Ziegler-Nichols gains, refined around the best of them."""
+        kp_values = np.linspace(0, 5, 26) if kp_values is None else kp_values
+        ki_values = np.linspace(0, 2, 21) if ki_values is None else ki_values
+        kd_values = np.linspace(0, 0.5, 11) if kd_values is None else kd_values
+        with self.worker_pool():
+            candidates = self.grid_search(kp_values, ki_values, kd_values, top)
+            try:
+                zn = self.ziegler_nichols()
+                zn["cost"] = float(self.evaluate([zn["kp"]], [zn["ki"]], [zn["kd"]])[0])
+                candidates.append(zn)
+            except ValueError:
+                pass  # No oscillation to identify; rely on the grid
+            start = min(candidates, key=lambda c: c["cost"])
+            return self.refine(start, top=top, seed=seed)
+
+    def plot(self, ranked, top=5, filename=None):
+        """Plot the responses of the best gain sets (saved to filename if given)."""
+        import matplotlib.pyplot as plt
+
+        ranked = ranked[:top]
+        result = batch_simulate([c["kp"] for c in ranked], [c["ki"] for c in ranked], [c["kd"] for c in ranked],
+                                self.setpoint, self.dt, steps=self.steps, plant=self.plant)
+        plt.figure(figsize=(12, 6))
+        plt.subplot(2, 1, 1)
+        for i, c in enumerate(ranked):
+            plt.plot(result["time"][:, i], result["pv"][:, i],
+                     label=f"#{i + 1} kp={c['kp']:.3g} ki={c['ki']:.3g} kd={c['kd']:.3g} (cost {c['cost']:.4g})")
+        plt.axhline(self.setpoint, linestyle='--', color='gray', label='Setpoint')
+        plt.xlabel('Time (s)')
+        plt.ylabel('Value')
+        plt.title('Best responses')
+        plt.legend()
+        plt.subplot(2, 1, 2)
+        for i in range(len(ranked)):
+            plt.plot(result["time"][:, i], result["control"][:, i])
+        plt.xlabel('Time (s)')
+        plt.ylabel('Control Output')
+        plt.tight_layout()
+        if filename:
+            plt.savefig(filename)
+        else:
+            plt.show()
+
+def neck_gains(gains, pixels_per_unit=5.0):
+    """
+    Convert tuned gains to eyeTracking.py's NECK_KP/KI/KD. The neck loop is the
+    same integrating process, but its error is in pixels rather than servo
+    units, so the gains are divided by the camera's pixels per servo unit
+    (CAMERA_PIXELS_PER_UNIT in eyeTracking.py). The simulated process has no
+    camera delay or servo rate limit, so check the gains in the eyeTracking
+    simulation before using them on the robot.
+    """
+    return {name: gains[name] / pixels_per_unit for name in ("kp", "ki", "kd")}
+
+def print_ranking(ranked):
+    for i, c in enumerate(ranked, 1):
+        print(f"{i:2d}. cost {c['cost']:10.4g}  kp={c['kp']:.4f}  ki={c['ki']:.4f}  kd={c['kd']:.4f}")
+
+if __name__ == '__main__':
+    tuner = AutoTuner()
+    ranked = tuner.tune(seed=0)
+    print_ranking(ranked)
+    neck = neck_gains(ranked[0])
+    print(f"NECK_KP = {neck['kp']:.4f}\nNECK_KI = {neck['ki']:.4f}\nNECK_KD = {neck['kd']:.4f}")
+    tuner.plot(ranked, filename="autotune_responses.png")
@@ -1,4 +1,5 @@
 # File: Ball.py
+import numpy as np
 import pygame
 
 class Ball:
@@ -48,4 +49,136 @@ class Ball:
 
     # Keep set_size if needed
     def set_size(self, r):
-        self.radius = r
\ No newline at end of file
+        self.radius = r
+
+class BallEngine:
+    """
+    Struct-of-arrays storage for many balls: position, radius, speed, color,
+    held direction and bounds box live in NumPy arrays (grown by doubling as
+    balls are added), so movement, speed caps, clamping and the orbit math are
+    each one vectorized pass over every ball. BallView gives one entry the
+    Ball API.
+    """
+    def __init__(self, config, boxes, capacity=16):
+        self.config = config
+        self.count = 0
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.radius = np.zeros(capacity)
+        self.speed = np.zeros(capacity)
+        self.dir_x = np.zeros(capacity)  # Direction held this frame: -1, 0 or 1
+        self.dir_y = np.zeros(capacity)
+        self.color = np.zeros((capacity, 3), dtype=np.uint8)
+        self.box = np.zeros(capacity, dtype=np.intp)  # Index into boxes
+        # Bounds boxes as (left, top, right, bottom) inside the border
+        border = config.BORDER_WIDTH
+        self.bounds = np.array([(r.left + border, r.top + border, r.right - border, r.bottom - border)
+                                for r in boxes], dtype=float)
+
+    def _grow(self):
+        for name in ('x', 'y', 'radius', 'speed', 'dir_x', 'dir_y', 'color', 'box'):
+            old = getattr(self, name)
+            new = np.zeros((2 * len(old),) + old.shape[1:], dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def add(self, color, x, y, radius=None, box=0):
+        """Add a ball at (x, y) kept inside boxes[box]; returns its index."""
+        if self.count == len(self.x):
+            self._grow()
+        i = self.count
+        self.x[i] = x
+        self.y[i] = y
+        self.radius[i] = self.config.BALL_RADIUS if radius is None else radius
+        self.speed[i] = self.config.BALL_SPEED
+        self.dir_x[i] = 0
+        self.dir_y[i] = 0
+        self.color[i] = color
+        self.box[i] = box
+        self.count += 1
+        return i
+
+    def move(self):
+        """
+        Same as Game.handle_ball_movement for every ball at once: balls holding
+        a direction accelerate up to twice the base speed and move, the others
+        fall back to the base speed.
+        """
+        n = self.count
+        base_speed = self.config.BALL_SPEED
+        dir_x, dir_y, speed = self.dir_x[:n], self.dir_y[:n], self.speed[:n]
+        moving = (dir_x != 0) | (dir_y != 0)
+        speed[:] = np.where(moving, np.minimum(speed + self.config.BALL_ACCELERATION, base_speed * 2), base_speed)
+        self.x[:n] += dir_x * speed
+        self.y[:n] += dir_y * speed
+
+    def clamp(self, indices=None):
+        """Same as Ball.update for every ball (or the given ones) against its own box."""
+        if indices is None:
+            indices = slice(0, self.count)
+        bounds = self.bounds[self.box[indices]]
+        radius = self.radius[indices]
+        self.x[indices] = np.clip(self.x[indices], bounds[:, 0] + radius, bounds[:, 2] - radius)
+        self.y[indices] = np.clip(self.y[indices], bounds[:, 1] + radius, bounds[:, 3] - radius)
+
+    def orbit(self, orbiters, centers, towards, orbit_radius):
+        """
+        Same as Game.smaller_ball_chaser for arrays of indices: each orbiter is
+        put orbit_radius from its center, on the line towards its target
+        (orbiters whose center and target coincide stay where they are).
+        """
+        delta_x = self.x[towards] - self.x[centers]
+        delta_y = self.y[towards] - self.y[centers]
+        apart = (delta_x != 0) | (delta_y != 0)
+        angle = np.arctan2(delta_y, delta_x)
+        self.x[orbiters] = np.where(apart, self.x[centers] + orbit_radius * np.cos(angle), self.x[orbiters])
+        self.y[orbiters] = np.where(apart, self.y[centers] + orbit_radius * np.sin(angle), self.y[orbiters])
+
+    def draw(self, surface):
+        """Draw every ball (pygame has no batched circle call)."""
+        circle = pygame.draw.circle
+        for color, x, y, radius in zip(self.color[:self.count].tolist(), self.x[:self.count].tolist(),
+                                       self.y[:self.count].tolist(), self.radius[:self.count].tolist()):
+            circle(surface, color, (x, y), radius)
+
+class BallView(Ball):
+    """A Ball whose state is entry index of a BallEngine; the Ball methods work unchanged."""
+    def __init__(self, engine, config, color, start_x=None, start_y=None, box=0):
+        self.engine = engine
+        self.config = config
+        self.index = engine.add(color,
+                                start_x if start_x is not None else config.SCREEN_WIDTH // 2,
+                                start_y if start_y is not None else config.SCREEN_HEIGHT // 2,
+                                box=box)
+
+    @property
+    def x(self):
+        return float(self.engine.x[self.index])
+
+    @x.setter
+    def x(self, value):
+        self.engine.x[self.index] = value
+
+    @property
+    def y(self):
+        return float(self.engine.y[self.index])
+
+    @y.setter
+    def y(self, value):
+        self.engine.y[self.index] = value
+
+    @property
+    def radius(self):
+        return float(self.engine.radius[self.index])
+
+    @radius.setter
+    def radius(self, value):
+        self.engine.radius[self.index] = value
+
+    @property
+    def color(self):
+        return tuple(self.engine.color[self.index].tolist())
+
+    @color.setter
+    def color(self, value):
+        self.engine.color[self.index] = value
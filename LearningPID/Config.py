@@ -41,6 +41,9 @@ class Config:
     # Frame rate
     FPS = 60
 
+    # Collision checks (SpatialHash grid)
+    COLLISION_CELL_SIZE = 50 # Grid cell side in pixels, about two ball diameters
+
     # Second ball margin
     SMALLER_BOX_WIDTH = 100
     SMALLER_BOX_HEIGHT = 50
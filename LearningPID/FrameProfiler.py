@@ -0,0 +1,136 @@
+# File: FrameProfiler.py
+import atexit
+import time
+
+# Histogram layout: four buckets per power of two of nanoseconds, up to about 18 minutes
+SUB_BUCKETS = 4
+HISTOGRAM_BUCKETS = 160
+OVERLAY_REFRESH = 0.5  # Seconds between overlay text updates
+
+def bucket_index(ns):
+    """Histogram bucket for a duration in nanoseconds (about 25% wide)."""
+    if ns < SUB_BUCKETS:
+        return max(ns, 0)
+    bits = ns.bit_length()
+    index = (bits - 3) * SUB_BUCKETS + (ns >> (bits - 3))
+    return index if index < HISTOGRAM_BUCKETS else HISTOGRAM_BUCKETS - 1
+
+def bucket_middle(index):
+    """Middle of a bucket's range in nanoseconds."""
+    if index < SUB_BUCKETS:
+        return index + 0.5
+    bits = index // SUB_BUCKETS + 2
+    mantissa = index % SUB_BUCKETS + SUB_BUCKETS
+    return (mantissa + 0.5) * (1 << (bits - 3))
+
+class PhaseHistogram:
+    """Fixed-size histogram of one phase's durations, plus exact count, total and maximum."""
+    __slots__ = ('counts', 'count', 'total', 'maximum')
+
+    def __init__(self):
+        self.counts = [0] * HISTOGRAM_BUCKETS
+        self.count = 0
+        self.total = 0
+        self.maximum = 0
+
+    def add(self, ns):
+        self.counts[bucket_index(ns)] += 1
+        self.count += 1
+        self.total += ns
+        if ns > self.maximum:
+            self.maximum = ns
+
+    def percentile(self, fraction):
+        """Approximate duration (ns) below which fraction of the samples fall."""
+        if not self.count:
+            return 0.0
+        wanted = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= wanted and count:
+                return min(bucket_middle(index), self.maximum)
+        return float(self.maximum)
+
+class FrameProfiler:
+    """
+    Times the phases of a loop: call start_frame() at the top of each
+    iteration and mark(phase) after each phase; a phase's time is the time
+    since the previous mark (or the frame start), and end_frame() records the
+    whole frame as "frame". Durations come from time.perf_counter_ns and go
+    into fixed-size PhaseHistograms, so memory does not grow with run length.
+
+    When disabled the three calls are replaced by a do-nothing function, so
+    leaving them in a hot loop costs one call each. With summary_file the
+    table from summary() is written there when the program exits.
+    """
+    def __init__(self, phases, enabled=False, summary_file=None, clock=time.perf_counter_ns):
+        self.phases = list(phases)
+        self.enabled = enabled
+        self.clock = clock
+        self.histograms = {phase: PhaseHistogram() for phase in self.phases + ["frame"]}
+        self.frame_start = 0
+        self.last_mark = 0
+        self.font = None
+        self.overlay_lines = []
+        self.overlay_time = 0.0
+        if not enabled:
+            self.start_frame = self.mark = self.end_frame = _ignore
+        elif summary_file:
+            atexit.register(self.write_summary, summary_file)
+
+    def start_frame(self):
+        self.frame_start = self.last_mark = self.clock()
+
+    def mark(self, phase):
+        """Record the time since the last mark as phase."""
+        now = self.clock()
+        self.histograms[phase].add(now - self.last_mark)
+        self.last_mark = now
+
+    def end_frame(self):
+        self.histograms["frame"].add(self.clock() - self.frame_start)
+
+    def summary(self):
+        """A table of count, mean, p50, p95, p99 and max per phase, in milliseconds."""
+        lines = [f"{'phase':<12} {'count':>8} {'mean':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}  (ms)"]
+        for phase, histogram in self.histograms.items():
+            if not histogram.count:
+                continue
+            lines.append(f"{phase:<12} {histogram.count:8d} {histogram.total / histogram.count / 1e6:9.3f} "
+                         f"{histogram.percentile(0.50) / 1e6:9.3f} {histogram.percentile(0.95) / 1e6:9.3f} "
+                         f"{histogram.percentile(0.99) / 1e6:9.3f} {histogram.maximum / 1e6:9.3f}")
+        return "\n".join(lines)
+
+    def write_summary(self, filename):
+        if not self.histograms["frame"].count:
+            return
+        with open(filename, "w") as f:
+            f.write(self.summary() + "\n")
+
+    def draw_overlay(self, surface):
+        """
+        Draws p50/p95/p99 per phase in the top left corner of a pygame
+        surface (usable as Game.overlay); the text is refreshed every
+        OVERLAY_REFRESH seconds.
+        """
+        import pygame
+
+        if self.font is None:
+            pygame.font.init()
+            self.font = pygame.font.SysFont("monospace", 12)
+        now = time.monotonic()
+        if now - self.overlay_time >= OVERLAY_REFRESH:
+            self.overlay_time = now
+            self.overlay_lines = [
+                self.font.render(f"{phase:<7}{h.percentile(0.5) / 1e6:6.2f}{h.percentile(0.95) / 1e6:6.2f}"
+                                 f"{h.percentile(0.99) / 1e6:6.2f}", True, (255, 255, 0), (0, 0, 0))
+                for phase, h in self.histograms.items() if h.count]
+            self.overlay_lines.insert(0, self.font.render("ms      p50   p95   p99", True, (255, 255, 0), (0, 0, 0)))
+        y = 2
+        for line in self.overlay_lines:
+            surface.blit(line, (2, y))
+            y += line.get_height()
+
+def _ignore(*args):
+    pass
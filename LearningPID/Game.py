@@ -1,5 +1,7 @@
 # File: Game.py
 import math
+import os
+import time
 
 import pygame
 import sys
@@ -8,11 +10,32 @@ from scipy.stats import arcsine
 
 import Config
 import Ball
+import FrameProfiler
+import InputLog
+import Renderer
+import SpatialHash
 import numpy as np
 
+class EngineSpeeds:
+    """Game.ball_speeds for the engine: speeds looked up by ball, stored in engine.speed."""
+    def __init__(self, engine):
+        self.engine = engine
+
+    def __getitem__(self, ball):
+        return float(self.engine.speed[ball.index])
+
+    def __setitem__(self, ball, speed):
+        self.engine.speed[ball.index] = speed
+
 class Game:
-    def __init__(self):
-        # ... (Initialization remains the same, ensure Ball() calls are correct) ...
+    def __init__(self, headless=False, engine=False, dirty_rects=False):
+        # Headless: no window (SDL's dummy video driver), nothing drawn, and step() instead of run()
+        self.headless = headless
+        # Engine: keep the balls in a Ball.BallEngine (NumPy arrays) so add_agents() scales to thousands
+        self.use_engine = engine
+        self.verbose = not headless  # Headless runs would otherwise print every frame
+        if headless:
+            os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
         pygame.init()
         self.config = Config.Config()
         self.screen = pygame.display.set_mode((self.config.SCREEN_WIDTH, self.config.SCREEN_HEIGHT))
@@ -38,29 +61,57 @@ class Game:
         self.target_rect = pygame.Rect(target_x, target_y, self.config.TARGET_WIDTH, self.config.TARGET_HEIGHT)
         self.target_color = self.config.TARGET_COLOR_NORMAL
 
+        # Target zones, filed in a spatial hash so a ball only checks nearby ones
+        self.targets = []
+        self.target_hash = SpatialHash.SpatialHash(self.config.COLLISION_CELL_SIZE)
+        self.add_target(self.target_rect)
+        self.ball_hash = SpatialHash.SpatialHash(self.config.COLLISION_CELL_SIZE)
+
         # Create the balls (ensure these calls match the corrected Ball.__init__)
-        self.ball1 = Ball.Ball(self.config, self.config.RED)
+        if engine:
+            self.engine = Ball.BallEngine(self.config, [self.box_rect, self.smaller_box_rect])
+            make_ball = lambda color, box=0, **start: Ball.BallView(self.engine, self.config, color, box=box, **start)
+        else:
+            self.engine = None
+            make_ball = lambda color, box=0, **start: Ball.Ball(self.config, color, **start)
+        self.ball1 = make_ball(self.config.RED)
         start_x_ball2 = self.config.SCREEN_WIDTH // 2
         start_y_ball2 = self.config.SCREEN_HEIGHT // 2 + self.config.BALL_RADIUS * 3
-        self.ball2 = Ball.Ball(self.config, self.config.BLUE, start_x=start_x_ball2, start_y=start_y_ball2)
+        self.ball2 = make_ball(self.config.BLUE, box=1, start_x=start_x_ball2, start_y=start_y_ball2)
 
         start_x_ball3 = start_x_ball2 + self.config.BALL_RADIUS * 2
         start_y_ball3 = start_y_ball2 + self.config.BALL_RADIUS * 2
         #self.ball3 = Ball.Ball(self.config, self.config.NICE_BLUE, start_x=start_x_ball3, start_y=start_y_ball3)
-        self.ball3 = Ball.Ball(self.config, self.config.NICE_BLUE,
+        self.ball3 = make_ball(self.config.NICE_BLUE,
                                start_x=start_x_ball2 + self.config.ORBIT_RADIUS,  # Initial offset
                                start_y=start_y_ball2,)  # Use smaller radius
 
         self.ball3.set_size(self.config.BALL_RADIUS/2)
         # Use a dictionary to track current speeds
-        self.ball_speeds = {
-            self.ball1: self.config.BALL_SPEED,
-            self.ball2: self.config.BALL_SPEED,
-            self.ball3: self.config.BALL_SPEED #remove?
+        if engine:
+            self.ball_speeds = EngineSpeeds(self.engine)  # Same lookups, backed by engine.speed
+        else:
+            self.ball_speeds = {
+                self.ball1: self.config.BALL_SPEED,
+                self.ball2: self.config.BALL_SPEED,
+                self.ball3: self.config.BALL_SPEED #remove?
+            }
+        # Keys for each player-controlled ball (left, right, up, down)
+        self.key_bindings = {
+            self.ball1: (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN),
+            self.ball2: (pygame.K_a, pygame.K_d, pygame.K_w, pygame.K_s),
         }
 
+        # Dirty rects: redraw only what changed, from a cached background and ball sprites
+        self.renderer = Renderer.DirtyRenderer(self.screen, self.config, self.box_rect) if dirty_rects else None
+
         self.orbit_angle = 0.0
         self.clock = pygame.time.Clock()
+        self.frame = 0  # Frames simulated (by run() or step())
+        self.recorder = None  # InputLog.InputRecorder while run() records the keys
+        self.overlay = None  # Optional function drawing extra things on the screen (full redraws only)
+        # Per-phase frame times; disabled (and next to free) unless run() is asked to profile
+        self.profiler = FrameProfiler.FrameProfiler(("events", "input", "update", "draw", "wait"))
 
     # --- Update handle_ball_movement ---
     def handle_ball_movement(self, ball, keys):
@@ -121,19 +172,65 @@ class Game:
     # --- Methods run, _handle_events, _handle_input, _update, _check_*, _draw, _quit_game remain the same ---
     # Make sure _handle_input calls handle_ball_movement for both balls as before.
 
-    def run(self):
-        """Starts the main game loop."""
+    def run(self, record_to=None, profile_to=None):
+        """
+        Starts the main game loop (recording the keys to the file record_to,
+        if given). With profile_to, each phase of the frame is timed, shown
+        in an overlay, and summarised in the file profile_to on exit.
+        """
+        if record_to:
+            self.recorder = InputLog.InputRecorder()
+        if profile_to:
+            self.profiler = FrameProfiler.FrameProfiler(self.profiler.phases, enabled=True, summary_file=profile_to)
+            self.overlay = self.profiler.draw_overlay
+        profiler = self.profiler
         running = True
         while running:
+            profiler.start_frame()
             running = self._handle_events()
             if not running:
                 break
+            profiler.mark("events")
             self._handle_input()
+            profiler.mark("input")
             self._update()
+            self.frame += 1
+            profiler.mark("update")
             self._draw()
+            profiler.mark("draw")
             self.clock.tick(self.config.FPS)
+            profiler.mark("wait")
+            profiler.end_frame()
+        if self.recorder is not None:
+            frames = self.recorder.save(record_to, self)
+            print(f"Recorded {frames} frames to {record_to}")
         self._quit_game()
 
+    def step(self, inputs=()):
+        """
+        Advances the game by one fixed frame (1 / FPS seconds of game time) with
+        the given keys held (pygame key constants, e.g. {pygame.K_RIGHT}),
+        without drawing or waiting for the clock.
+        """
+        self._apply_input(InputLog.PressedKeys(inputs))
+        self._update()
+        self.frame += 1
+
+    def simulate(self, frames, inputs=()):
+        """
+        Runs step() frames times. inputs is either the keys held throughout or
+        a function of the frame number returning the keys held in that frame.
+        Returns the real seconds it took.
+        """
+        start = time.perf_counter()
+        for _ in range(frames):
+            self.step(inputs(self.frame) if callable(inputs) else inputs)
+        return time.perf_counter() - start
+
+    def game_time(self):
+        """Seconds of game time simulated so far."""
+        return self.frame / self.config.FPS
+
     def _handle_events(self):
         """Process Pygame events."""
         for event in pygame.event.get():
@@ -144,11 +241,46 @@ class Game:
     def _handle_input(self):
         """Check keyboard state and call handler for each ball."""
         keys = pygame.key.get_pressed()
-        self.handle_ball_movement(self.ball1, keys)
-        self.handle_ball_movement(self.ball2, keys)
+        if self.recorder is not None:
+            self.recorder.record(keys)
+        self._apply_input(keys)
+
+    def _apply_input(self, keys):
+        """Move both balls for the given key state."""
+        if self.engine is None:
+            self.handle_ball_movement(self.ball1, keys)
+            self.handle_ball_movement(self.ball2, keys)
+            return
+        # Engine: set the held directions, then move every ball in one pass
+        for ball, (left_key, right_key, up_key, down_key) in self.key_bindings.items():
+            self.engine.dir_x[ball.index] = 1 if keys[right_key] else -1 if keys[left_key] else 0
+            self.engine.dir_y[ball.index] = 1 if keys[down_key] else -1 if keys[up_key] else 0
+        self.engine.move()
+
+    def add_agents(self, count, seed=None):
+        """
+        Engine only: adds count extra balls at random places in the big box,
+        each with a random color from the config and holding a random
+        direction, for scaling experiments.
+        """
+        rng = np.random.default_rng(seed)
+        left, top, right, bottom = self.engine.bounds[0]
+        radius = self.config.MICRO_BALL_RADIUS
+        colors = (self.config.RED, self.config.BLUE, self.config.GREEN, self.config.NICE_BLUE, self.config.DARK_GRAY)
+        for _ in range(count):
+            i = self.engine.add(colors[rng.integers(len(colors))], rng.uniform(left + radius, right - radius),
+                                rng.uniform(top + radius, bottom - radius), radius=radius)
+            self.engine.dir_x[i], self.engine.dir_y[i] = rng.integers(-1, 2, 2)
 
     def _update(self):
         """Update all game objects."""
+        if self.engine is not None:
+            # One clamping pass for every ball, the orbit, then ball3's clamp as below
+            self.engine.clamp()
+            self.engine.orbit([self.ball3.index], [self.ball2.index], [self.ball1.index], self.config.ORBIT_RADIUS)
+            self.engine.clamp([self.ball3.index])
+            self.ball_chaser()
+            return
         self.ball1.update(self.box_rect)
         self.ball2.update(self.smaller_box_rect)
 
@@ -159,12 +291,24 @@ class Game:
         self.ball3.update(self.box_rect)
         self.ball_chaser()
 
+    def add_target(self, rect):
+        """Add a target zone; returns its index in self.targets."""
+        self.targets.append(pygame.Rect(rect))
+        self.target_hash.update(len(self.targets) - 1, rect)
+        return len(self.targets) - 1
+
+    def _targets_hit(self, rect):
+        """Indices of the targets overlapping rect, checking only those in nearby cells."""
+        targets = self.targets
+        return [i for i in self.target_hash.query(rect) if targets[i].colliderect(rect)]
+
     def _check_target_area(self, ball_to_check):
-        """Check for collision with the target rectangle."""
+        """Check for collision with the target rectangles."""
         ball_rect = ball_to_check.get_rect()
-        if ball_rect.colliderect(self.target_rect):
+        if self._targets_hit(ball_rect):
             if ball_to_check is self.ball1:
-                print("here")
+                if self.verbose:
+                    print("here")
                 self.target_color = self.config.TARGET_COLOR_HIT
         elif ball_to_check is self.ball1:
              self.target_color = self.config.TARGET_COLOR_NORMAL
@@ -174,17 +318,60 @@ class Game:
         if ball_to_check is self.ball1:
             ball_x, _ = ball_to_check.get_position()
             if abs(ball_x - self.config.HELLO_POINT_X) <= self.config.HELLO_POINT_TOLERANCE:
-                print("hello")
+                if self.verbose:
+                    print("hello")
+
+    def _ball_circles(self):
+        """(id, x, y, radius) of every ball; ids are engine indices, or 0-2 for ball1-ball3."""
+        if self.engine is not None:
+            n = self.engine.count
+            return zip(range(n), self.engine.x[:n].tolist(), self.engine.y[:n].tolist(),
+                       self.engine.radius[:n].tolist())
+        return [(i, ball.x, ball.y, ball.radius) for i, ball in enumerate((self.ball1, self.ball2, self.ball3))]
+
+    def check_collisions(self):
+        """
+        Updates the ball hash with every ball's current position and returns
+        ({ball id: [target indices hit]}, [(ball id, ball id) of overlapping balls]),
+        looking only at objects in nearby grid cells.
+        """
+        ball_hash = self.ball_hash
+        circles = {}
+        target_hits = {}
+        for i, x, y, radius in self._ball_circles():
+            rect = (x - radius, y - radius, 2 * radius, 2 * radius)
+            ball_hash.update(i, rect)
+            circles[i] = (x, y, radius)
+            hit = self._targets_hit(rect)
+            if hit:
+                target_hits[i] = hit
+        touching = [(a, b) for a, b in ball_hash.pairs()
+                    if SpatialHash.circles_overlap(*circles[a], *circles[b])]
+        return target_hits, touching
 
     def _draw(self):
         """Draw all game elements to the screen."""
+        if self.renderer is not None:
+            if self.engine is not None:
+                n = self.engine.count
+                self.renderer.draw(self.engine.x[:n], self.engine.y[:n], self.engine.radius[:n], self.engine.color[:n])
+            else:
+                balls = (self.ball1, self.ball2, self.ball3)
+                self.renderer.draw([b.x for b in balls], [b.y for b in balls],
+                                   [b.radius for b in balls], [b.color for b in balls])
+            return
         self.screen.fill(self.config.BLACK)
         pygame.draw.rect(self.screen, self.config.BOX_COLOR, self.box_rect)
         pygame.draw.rect(self.screen, self.config.BORDER_COLOR, self.box_rect, self.config.BORDER_WIDTH)
         # pygame.draw.rect(self.screen, self.target_color, self.target_rect)
-        self.ball1.draw(self.screen)
-        self.ball2.draw(self.screen)
-        self.ball3.draw(self.screen)
+        if self.engine is not None:
+            self.engine.draw(self.screen)
+        else:
+            self.ball1.draw(self.screen)
+            self.ball2.draw(self.screen)
+            self.ball3.draw(self.screen)
+        if self.overlay is not None:
+            self.overlay(self.screen)
         pygame.display.flip()
 
     def _quit_game(self):
@@ -233,7 +420,8 @@ class Game:
         # delta_xX = x1 - x3
 
         if abs(delta_x) > 10:
-            print("Ball position doesn't match the ball2 position.")
+            if self.verbose:
+                print("Ball position doesn't match the ball2 position.")
             if delta_x > 0:
                 self.move_ball_programmatically(self.ball2, "R")
             if delta_x < 0:
@@ -268,5 +456,38 @@ class Game:
             self.ball3.x = b2_x + orbit_radius * math.cos(angle_to_ball1)
             self.ball3.y = b2_y + orbit_radius * math.sin(angle_to_ball1)
 if __name__ == "__main__":
-    game = Game()
-    game.run()
\ No newline at end of file
+    if len(sys.argv) > 1 and sys.argv[1] == "headless":
+        # "python Game.py headless [frames] [agents]": hold RIGHT and D and report how fast the game runs
+        # (with agents, the balls live in the NumPy engine along with that many extra ones)
+        frames = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+        agents = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+        game = Game(headless=True, engine=agents > 0)
+        if agents:
+            game.add_agents(agents, seed=0)
+        elapsed = game.simulate(frames, {pygame.K_RIGHT, pygame.K_d})
+        print(f"{frames} frames ({game.game_time():.0f} s of game time) in {elapsed:.3f} s, "
+              f"{game.game_time() / elapsed:.0f}x real time")
+        print(f"ball1 {game.ball1.get_position()}, ball2 {game.ball2.get_position()}, "
+              f"ball3 {game.ball3.get_position()}")
+        pygame.quit()
+    elif len(sys.argv) > 1 and sys.argv[1] == "profile":
+        # "python Game.py profile [summary file]": play with frame timings on screen, written out on exit
+        game = Game()
+        game.run(profile_to=sys.argv[2] if len(sys.argv) > 2 else "game_profile.txt")
+    elif len(sys.argv) > 2 and sys.argv[1] == "record":
+        # "python Game.py record run.inp": play, and save the keys when the window is closed
+        game = Game()
+        game.run(record_to=sys.argv[2])
+    elif len(sys.argv) > 2 and sys.argv[1] == "replay":
+        # "python Game.py replay run.inp [realtime]": replay headless at full speed, or drawn at FPS
+        realtime = len(sys.argv) > 3 and sys.argv[3] == "realtime"
+        log = InputLog.load_inputs(sys.argv[2])
+        game = Game(headless=not realtime)
+        matches, difference, elapsed = InputLog.replay(game, log, realtime=realtime)
+        print(f"Replayed {game.frame} of {len(log)} frames in {elapsed:.3f} s; final positions "
+              f"{'match' if matches else f'differ by up to {difference:.6f} px'}")
+        pygame.quit()
+        sys.exit(0 if matches else 1)
+    else:
+        game = Game()
+        game.run()
@@ -0,0 +1,102 @@
+# File: InputLog.py
+import struct
+import time
+
+import pygame
+
+# The keys that move ball1 (arrows) and ball2 (WASD), one bit each per frame
+RECORDED_KEYS = (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN,
+                 pygame.K_a, pygame.K_d, pygame.K_w, pygame.K_s)
+INPUT_MAGIC = b"INP1"
+# File layout: magic, key count, frame count, ball1-ball3 (x, y) after the last
+# frame, then one byte per frame (bit i set = RECORDED_KEYS[i] held).
+HEADER_FORMAT = "<4sII6d"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+POSITION_TOLERANCE = 1e-6  # Pixels a replayed final position may differ by
+
+class PressedKeys:
+    """A frame's key state with the same lookups as pygame.key.get_pressed()."""
+    def __init__(self, keys=()):
+        self.keys = frozenset(keys)
+
+    def __getitem__(self, key):
+        return key in self.keys
+
+# Key states for every possible frame byte, so replaying a frame is one lookup
+FRAME_KEYS = [PressedKeys(key for bit, key in enumerate(RECORDED_KEYS) if byte >> bit & 1) for byte in range(256)]
+
+def pack_keys(keys):
+    """The frame byte for a key state (anything indexable by key, like get_pressed())."""
+    byte = 0
+    for bit, key in enumerate(RECORDED_KEYS):
+        if keys[key]:
+            byte |= 1 << bit
+    return byte
+
+def ball_positions(game):
+    """ball1-ball3 centers as a flat tuple (x1, y1, x2, y2, x3, y3)."""
+    return tuple(float(v) for ball in (game.ball1, game.ball2, game.ball3) for v in ball.get_position())
+
+class InputRecorder:
+    """Collects one byte per frame of the keys that move ball1 and ball2."""
+    def __init__(self):
+        self.frames = bytearray()
+
+    def record(self, keys):
+        self.frames.append(pack_keys(keys))
+
+    def save(self, filename, game):
+        """Write the recording with game's final ball positions; returns the number of frames."""
+        with open(filename, "wb") as f:
+            f.write(struct.pack(HEADER_FORMAT, INPUT_MAGIC, len(RECORDED_KEYS), len(self.frames),
+                                *ball_positions(game)))
+            f.write(self.frames)
+        return len(self.frames)
+
+class InputLog:
+    """A loaded recording: frames (bytes, one per frame) and final_positions."""
+    def __init__(self, frames, final_positions):
+        self.frames = frames
+        self.final_positions = final_positions
+
+    def __len__(self):
+        return len(self.frames)
+
+def load_inputs(filename):
+    with open(filename, "rb") as f:
+        data = f.read()
+    magic, key_count, frame_count, *positions = struct.unpack_from(HEADER_FORMAT, data)
+    if magic != INPUT_MAGIC or key_count != len(RECORDED_KEYS):
+        raise ValueError(f"{filename} is not an input recording with {len(RECORDED_KEYS)} keys")
+    frames = data[HEADER_SIZE:HEADER_SIZE + frame_count]
+    if len(frames) != frame_count:
+        raise ValueError(f"{filename} is truncated: {len(frames)} of {frame_count} frames")
+    return InputLog(frames, tuple(positions))
+
+def replay(game, log, realtime=False):
+    """
+    Feeds a recording through game frame by frame (the keys go through
+    handle_ball_movement as if they were held). Headless games run at full
+    speed; with realtime the game is drawn and paced at FPS, and closing the
+    window stops early. Returns (final positions match, largest difference
+    in pixels, seconds taken).
+    """
+    start = time.perf_counter()
+    if realtime:
+        for byte in log.frames:
+            if not game._handle_events():
+                break
+            game._apply_input(FRAME_KEYS[byte])
+            game._update()
+            game.frame += 1
+            game._draw()
+            game.clock.tick(game.config.FPS)
+    else:
+        apply_input, update = game._apply_input, game._update
+        for byte in log.frames:
+            apply_input(FRAME_KEYS[byte])
+            update()
+        game.frame += len(log.frames)
+    elapsed = time.perf_counter() - start
+    difference = max(abs(a - b) for a, b in zip(ball_positions(game), log.final_positions))
+    return difference <= POSITION_TOLERANCE, difference, elapsed
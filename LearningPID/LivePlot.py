@@ -0,0 +1,168 @@
+# File: LivePlot.py
+import time
+
+import numpy as np
+
+# Storage and drawing limits
+HISTORY_CAPACITY = 20000  # Samples kept per run; older ones are downsampled when full
+DISPLAY_POINTS = 1000  # Points drawn per line, whatever the length of the run
+REDRAW_INTERVAL = 0.05  # Seconds between redraws
+AXIS_MARGIN = 0.1  # Headroom added when a line leaves the value limits
+TIME_GROWTH = 1.5  # The time axis grows by this factor when a run outgrows it
+
+def lttb(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets downsampling: picks n_out of the points
+    (x, y) so that the picked polyline keeps the shape of the original,
+    peaks included. Returns the indices of the picked points.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    picked = np.empty(n_out, dtype=np.intp)
+    picked[0] = 0
+    picked[-1] = n - 1
+    # Bucket edges over the points between the first and the last
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        # The next bucket's average is the third corner of the triangle
+        next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        next_end = max(next_end, next_start + 1)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        bucket_x = x[start:end]
+        bucket_y = y[start:end]
+        area = np.abs((x[a] - avg_x) * (bucket_y - y[a]) - (x[a] - bucket_x) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        picked[i + 1] = a
+    return picked
+
+class SampleHistory:
+    """
+    Bounded, preallocated storage for a run: a time column plus named value
+    columns. When the arrays are full the history is downsampled with LTTB
+    (on the first column's shape) to half its capacity, so memory stays flat
+    however long the run goes on.
+    """
+    def __init__(self, names, capacity=HISTORY_CAPACITY):
+        self.names = list(names)
+        self.capacity = capacity
+        self.time = np.empty(capacity)
+        self.values = np.empty((len(self.names), capacity))
+        self.count = 0
+
+    def append(self, t, *values):
+        if self.count == self.capacity:
+            self._compact()
+        self.time[self.count] = t
+        self.values[:, self.count] = values
+        self.count += 1
+
+    def _compact(self):
+        keep = lttb(self.time, self.values[0], self.capacity // 2)
+        kept = len(keep)
+        self.time[:kept] = self.time[keep]
+        self.values[:, :kept] = self.values[:, keep]
+        self.count = kept
+
+    def downsampled(self, points=DISPLAY_POINTS):
+        """(time, values) reduced to at most points samples for drawing."""
+        n = self.count
+        keep = lttb(self.time[:n], self.values[0, :n], points)
+        return self.time[keep], self.values[:, keep]
+
+class LivePlot:
+    """
+    Streaming version of graph() in main.py: the same two panels (PV against
+    setpoint, and control output), updated while the run goes on.
+
+    Samples go into a SampleHistory; at most every REDRAW_INTERVAL seconds
+    the lines are redrawn from an LTTB-downsampled copy of DISPLAY_POINTS
+    points using blitting, so a redraw costs the same for a hundred or a
+    million samples. The full figure is only redrawn when a line outgrows its
+    axis limits.
+    """
+    def __init__(self, title='Process Variable vs. Setpoint', capacity=HISTORY_CAPACITY,
+                 display_points=DISPLAY_POINTS, redraw_interval=REDRAW_INTERVAL):
+        import matplotlib.pyplot as plt
+
+        self.plt = plt
+        self.display_points = display_points
+        self.redraw_interval = redraw_interval
+        self.history = SampleHistory(("pv", "setpoint", "control"), capacity)
+        self.next_redraw = 0.0
+
+        plt.ion()
+        self.fig, (self.value_axes, self.control_axes) = plt.subplots(2, 1, figsize=(12, 6))
+        self.pv_line, = self.value_axes.plot([], [], label='Process Variable (PV)', animated=True)
+        self.setpoint_line, = self.value_axes.plot([], [], label='Setpoint', linestyle='--', animated=True)
+        self.control_line, = self.control_axes.plot([], [], label='Control Output', animated=True)
+        self.value_axes.set_xlabel('Time (s)')
+        self.value_axes.set_ylabel('Value')
+        self.value_axes.set_title(title)
+        self.value_axes.legend()
+        self.control_axes.set_xlabel('Time (s)')
+        self.control_axes.set_ylabel('Control Output')
+        self.control_axes.set_title('Control Output over Time')
+        self.control_axes.legend()
+        self.fig.tight_layout()
+        self.value_axes.set_xlim(0, 1)
+        self.control_axes.set_xlim(0, 1)
+        self._full_redraw()
+
+    def _full_redraw(self):
+        """Draw the static parts and remember them as the blitting background."""
+        self.fig.canvas.draw()
+        self.background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+
+    def _fit(self, axes, t, *columns):
+        """Grow the axes' limits to hold the data; True if they changed (and need a full redraw)."""
+        changed = False
+        t_max = t[-1]
+        if t_max > axes.get_xlim()[1]:
+            axes.set_xlim(axes.get_xlim()[0], t_max * TIME_GROWTH)
+            changed = True
+        low = min(float(np.min(c)) for c in columns)
+        high = max(float(np.max(c)) for c in columns)
+        y_low, y_high = axes.get_ylim()
+        if low < y_low or high > y_high:
+            span = max(high - low, 1e-9)
+            axes.set_ylim(min(low, y_low) - span * AXIS_MARGIN, max(high, y_high) + span * AXIS_MARGIN)
+            changed = True
+        return changed
+
+    def add(self, t, pv, control, setpoint):
+        """Record one sample and redraw if REDRAW_INTERVAL has passed."""
+        self.history.append(t, pv, setpoint, control)
+        now = time.monotonic()
+        if now >= self.next_redraw:
+            self.next_redraw = now + self.redraw_interval
+            self.redraw()
+
+    def redraw(self):
+        if self.history.count == 0:
+            return
+        t, (pv, setpoint, control) = self.history.downsampled(self.display_points)
+        self.pv_line.set_data(t, pv)
+        self.setpoint_line.set_data(t, setpoint)
+        self.control_line.set_data(t, control)
+        resized = self._fit(self.value_axes, t, pv, setpoint)
+        resized = self._fit(self.control_axes, t, control) or resized
+        if resized:
+            self._full_redraw()
+        canvas = self.fig.canvas
+        canvas.restore_region(self.background)
+        for line in (self.pv_line, self.setpoint_line, self.control_line):
+            line.axes.draw_artist(line)
+        canvas.blit(self.fig.bbox)
+        canvas.flush_events()
+
+    def show(self):
+        """Final redraw, then keep the window open until it is closed."""
+        self.redraw()
+        for line in (self.pv_line, self.setpoint_line, self.control_line):
+            line.set_animated(False)
+        self.plt.ioff()
+        self.plt.show()
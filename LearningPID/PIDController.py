@@ -0,0 +1,317 @@
+# File: PIDController.py
+import time
+
+from FrameProfiler import PhaseHistogram
+
+# Fixed-rate runner
+SPIN_MARGIN = 0.002  # Seconds before a deadline where sleeping stops and busy-waiting starts
+
+class PIDController:
+    """
+    Stateful PID for a fixed dt, for loops run at high rates.
+
+    Works in velocity (incremental) form: each step adds a change to the
+    previous output, using coefficients worked out once in __init__, so a
+    step is a few multiply-adds with no division and nothing passed in or
+    returned but the measurement and the output. Without options it gives the
+    same outputs as pid_controller in main.py.
+
+    derivative_filter is the time constant (s) of a first-order low-pass on
+    the derivative term (0 = unfiltered). With output_limits (low, high) the
+    output is clamped, and because the integral lives in the output, clamping
+    it also stops the integral winding up.
+
+    Without either option step is a specialised closure that keeps the
+    coefficients and state in local variables, and is faster than
+    pid_controller (see benchmark()). Assigning setpoint rebuilds it around
+    the current state, so both kinds of step follow the new setpoint.
+    """
+    __slots__ = ('_setpoint', 'low', 'high', 'fast', 'step', '_state', '_output', '_previous_error',
+                 '_derivative', 'c_error', 'c_previous', 'd_decay', 'd_gain', 'q0', 'q1', 'q2')
+
+    def __init__(self, kp, ki, kd, dt, setpoint=0.0, derivative_filter=0.0, output_limits=None):
+        self._setpoint = setpoint
+        self.low, self.high = output_limits if output_limits else (float('-inf'), float('inf'))
+        # u[k] = u[k-1] + c_error * e[k] + c_previous * e[k-1] + (d[k] - d[k-1])
+        self.c_error = kp + ki * dt
+        self.c_previous = -kp
+        # d[k] = d_decay * d[k-1] + d_gain * (e[k] - e[k-1])  (backward Euler of kd*s / (tf*s + 1))
+        self.d_decay = derivative_filter / (derivative_filter + dt)
+        self.d_gain = kd / (derivative_filter + dt)
+        # Unfiltered and unclamped: u[k] = u[k-1] + q0 * e[k] + q1 * e[k-1] + q2 * e[k-2]
+        self.q0 = kp + ki * dt + kd / dt
+        self.q1 = -kp - 2 * kd / dt
+        self.q2 = kd / dt
+        self.fast = derivative_filter == 0 and not output_limits
+        self.reset()
+
+    def reset(self, output=0.0):
+        """Start again from output, as if the error had been zero so far."""
+        self._start(output, 0.0, 0.0)
+
+    @property
+    def setpoint(self):
+        return self._setpoint
+
+    @setpoint.setter
+    def setpoint(self, setpoint):
+        self._setpoint = setpoint
+        if self.fast:
+            # The closure holds the old setpoint: rebuild it around the current state
+            self._start(*self._state())
+
+    def retarget(self, setpoint):
+        """Change the setpoint, carrying on from the current state."""
+        self.setpoint = setpoint
+
+    @property
+    def output(self):
+        """The last control output."""
+        return self._state()[0] if self.fast else self._output
+
+    def _start(self, output, previous_error, older_error):
+        """Set the state (output, e[k-1], e[k-2]) and bind step for it."""
+        if not self.fast:
+            self._output = output
+            self._previous_error = previous_error
+            self._derivative = self.d_gain * (previous_error - older_error)
+            self.step = self._step
+            return
+        setpoint, q0, q1, q2 = self._setpoint, self.q0, self.q1, self.q2
+        e1, e2 = previous_error, older_error
+
+        def step(pv):
+            """One control step for the measurement pv; returns the control output."""
+            nonlocal output, e1, e2
+            error = setpoint - pv
+            output += q0 * error + q1 * e1 + q2 * e2
+            e2 = e1
+            e1 = error
+            return output
+
+        def state():
+            return output, e1, e2
+
+        self.step = step
+        self._state = state
+
+    def _step(self, pv):
+        """One control step for the measurement pv; returns the control output."""
+        error = self._setpoint - pv
+        change = error - self._previous_error
+        derivative = self.d_decay * self._derivative + self.d_gain * change
+        output = (self._output + self.c_error * error + self.c_previous * self._previous_error
+                  + derivative - self._derivative)
+        if output > self.high:
+            output = self.high
+        elif output < self.low:
+            output = self.low
+        self._output = output
+        self._previous_error = error
+        self._derivative = derivative
+        return output
+
+class PIDBank:
+    """
+    Many independent PIDController loops (e.g. one per servo) stepped together
+    on NumPy arrays. kp, ki, kd, setpoint, derivative_filter and the limits
+    may be numbers or one value per loop; dt is shared. Every step works in
+    place on preallocated arrays, and the returned outputs are one array
+    that the next step overwrites.
+
+    A step costs a handful of NumPy calls whatever the loop count, so it
+    beats stepping scalar PIDControllers only from a few dozen loops on
+    (see benchmark()).
+    """
+    __slots__ = ('setpoint', 'output', 'low', 'high', 'previous_error', 'older_error', 'derivative',
+                 'error', 'work', 'fast', 'c_error', 'c_previous', 'd_decay', 'd_gain', 'q0', 'q1', 'q2', 'np')
+
+    def __init__(self, count, kp, ki, kd, dt, setpoint=0.0, derivative_filter=0.0, output_limits=None):
+        import numpy as np
+
+        self.np = np
+        kp, ki, kd, tf = (np.broadcast_to(np.asarray(v, dtype=float), count).copy()
+                          for v in (kp, ki, kd, derivative_filter))
+        self.setpoint = np.broadcast_to(np.asarray(setpoint, dtype=float), count).copy()
+        low, high = output_limits if output_limits else (-np.inf, np.inf)
+        self.low = np.broadcast_to(np.asarray(low, dtype=float), count).copy()
+        self.high = np.broadcast_to(np.asarray(high, dtype=float), count).copy()
+        # Same coefficients as PIDController
+        self.c_error = kp + ki * dt
+        self.c_previous = -kp
+        self.d_decay = tf / (tf + dt)
+        self.d_gain = kd / (tf + dt)
+        self.q0 = kp + ki * dt + kd / dt
+        self.q1 = -kp - 2 * kd / dt
+        self.q2 = kd / dt
+        self.fast = not tf.any() and not output_limits
+        self.output = np.zeros(count)
+        self.previous_error = np.zeros(count)
+        self.older_error = np.zeros(count)
+        self.derivative = np.zeros(count)
+        self.error = np.zeros(count)
+        self.work = np.zeros(count)
+
+    def reset(self, output=0.0):
+        self.output[:] = output
+        self.previous_error[:] = 0.0
+        self.older_error[:] = 0.0
+        self.derivative[:] = 0.0
+
+    def step(self, pv):
+        """One step of every loop for the array of measurements pv; returns the outputs."""
+        np = self.np
+        error, work, output = self.error, self.work, self.output
+        np.subtract(self.setpoint, pv, out=error)
+        if self.fast:
+            # u[k] = u[k-1] + q0 * e[k] + q1 * e[k-1] + q2 * e[k-2]
+            output += np.multiply(self.q0, error, out=work)
+            output += np.multiply(self.q1, self.previous_error, out=work)
+            output += np.multiply(self.q2, self.older_error, out=work)
+            # Rotate the error arrays instead of copying them
+            self.older_error, self.previous_error, self.error = self.previous_error, error, self.older_error
+            return output
+        output -= self.derivative
+        # d[k] = d_decay * d[k-1] + d_gain * (e[k] - e[k-1])
+        derivative = self.derivative
+        derivative *= self.d_decay
+        derivative += np.multiply(self.d_gain, np.subtract(error, self.previous_error, out=work), out=work)
+        output += derivative
+        output += np.multiply(self.c_error, error, out=work)
+        output += np.multiply(self.c_previous, self.previous_error, out=work)
+        np.clip(output, self.low, self.high, out=output)
+        self.previous_error, self.error = error, self.previous_error
+        return output
+
+class JitterStats:
+    """
+    Tick count, overruns and how late each tick started, for a fixed-rate run.
+    The lateness goes into a fixed-size PhaseHistogram, so memory does not
+    grow with run length.
+    """
+    __slots__ = ('ticks', 'overruns', 'late')
+
+    def __init__(self):
+        self.ticks = 0
+        self.overruns = 0
+        self.late = PhaseHistogram()  # Nanoseconds
+
+    def add(self, late, overrun):
+        self.ticks += 1
+        if overrun:
+            self.overruns += 1
+        self.late.add(int(late * 1e9))
+
+    def report(self):
+        if not self.ticks:
+            return "no ticks"
+        late = self.late
+        return (f"{self.ticks} ticks, {self.overruns} overruns, start jitter mean "
+                f"{late.total / late.count / 1e3:.1f} us, p99 {late.percentile(0.99) / 1e3:.1f} us, "
+                f"max {late.maximum / 1e3:.1f} us")
+
+def run_fixed_rate(step, rate, duration, clock=time.perf_counter, sleep=time.sleep):
+    """
+    Calls step() rate times per second for duration seconds on absolute
+    deadlines (a late tick does not push the later ones back). It sleeps
+    until SPIN_MARGIN before each deadline and busy-waits the rest, which
+    is what makes 1 kHz reachable with the OS sleep resolution.
+    A tick that starts after the next deadline counts as an overrun.
+    Returns the JitterStats.
+    """
+    period = 1.0 / rate
+    stats = JitterStats()
+    start = clock()
+    deadline = start
+    end = start + duration
+    while deadline < end:
+        remaining = deadline - clock()
+        if remaining > SPIN_MARGIN:
+            sleep(remaining - SPIN_MARGIN)
+        now = clock()
+        while now < deadline:
+            now = clock()
+        step()
+        late = now - deadline
+        stats.add(late, late > period)
+        deadline += period
+    return stats
+
+def _steps_per_second(run, steps, repeats=5):
+    """Best of repeats timings of run(steps), in steps per second."""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run(steps)
+        best = min(best, time.perf_counter() - start)
+    return steps / best
+
+def benchmark(steps=200000, loop_counts=(7, 100, 1000), rate=1000, duration=2.0):
+    """
+    Steps per second of pid_controller against PIDController (fast and
+    general step) on the same loop, PIDBank against stepping that many
+    scalar controllers, then a fixed-rate loop. Returns the fast step's
+    speedup over pid_controller, which should be above 1.
+    """
+    from main import pid_controller
+
+    kp, ki, kd, dt = 1.0, 0.1, 0.05, 0.001
+
+    def stateless(count):
+        pv, previous_error, integral = 0.0, 0.0, 0.0
+        for _ in range(count):
+            control, previous_error, integral = pid_controller(100, pv, kp, ki, kd, previous_error, integral, dt)
+            pv += control * dt
+
+    def controller_run(pid):
+        def run(count):
+            pid.reset()
+            step = pid.step
+            pv = 0.0
+            for _ in range(count):
+                pv += step(pv) * dt
+        return run
+
+    baseline = _steps_per_second(stateless, steps)
+    fast = _steps_per_second(controller_run(PIDController(kp, ki, kd, dt, setpoint=100)), steps)
+    general = _steps_per_second(controller_run(PIDController(kp, ki, kd, dt, setpoint=100, derivative_filter=0.002)), steps)
+    print(f"pid_controller:                 {baseline:12,.0f} steps/s")
+    print(f"PIDController (fast step):      {fast:12,.0f} steps/s  {fast / baseline:5.2f}x pid_controller")
+    print(f"PIDController (filtered step):  {general:12,.0f} steps/s  {general / baseline:5.2f}x pid_controller")
+
+    for loops in loop_counts:
+        bank = PIDBank(loops, kp, ki, kd, dt, setpoint=100)
+
+        def bank_run(count):
+            bank.reset()
+            pv = bank.output.copy()
+            for _ in range(count):
+                pv += bank.step(pv) * dt
+
+        scalars = [PIDController(kp, ki, kd, dt, setpoint=100) for _ in range(loops)]
+
+        def scalar_run(count):
+            steps_ = [pid.step for pid in scalars]
+            pv = [0.0] * loops
+            for _ in range(count):
+                for i, step in enumerate(steps_):
+                    pv[i] += step(pv[i]) * dt
+
+        count = max(steps // loops, 100)
+        bank_rate = _steps_per_second(bank_run, count) * loops
+        scalar_rate = _steps_per_second(scalar_run, count) * loops
+        print(f"PIDBank ({loops:4d} loops):          {bank_rate:12,.0f} loop steps/s  "
+              f"{bank_rate / scalar_rate:5.2f}x {loops} scalar controllers")
+
+    pid = PIDController(kp, ki, kd, dt, setpoint=100)
+    state = [0.0]
+
+    def tick():
+        state[0] += pid.step(state[0]) * dt
+
+    stats = run_fixed_rate(tick, rate, duration)
+    print(f"Fixed rate {rate} Hz: {stats.report()}")
+    return fast / baseline
+
+if __name__ == '__main__':
+    benchmark()
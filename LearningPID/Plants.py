@@ -0,0 +1,230 @@
+# File: Plants.py
+import math
+
+import numpy as np
+
+class LinearPlant:
+    """
+    A linear plant discretized for one time step: x[k+1] = Ad x[k] + Bd u[k],
+    output y = x[0]. States are stored as an (n, states) array so n copies of
+    the plant (one per PID configuration) step together with one small
+    matrix product. motion_states are the indices of states that describe
+    motion (e.g. velocity), which PositionSaturated zeroes at a stop.
+    """
+    def __init__(self, Ad, Bd, motion_states=()):
+        self.Ad_T = np.ascontiguousarray(np.asarray(Ad, dtype=float).T)
+        self.Bd = np.asarray(Bd, dtype=float)
+        self.motion_states = list(motion_states)
+
+    def reset(self, n, y0=0.0):
+        """State for n plants with output y0 and no earlier input."""
+        state = np.zeros((n, len(self.Bd)))
+        state[:, 0] = y0
+        return state
+
+    def step(self, state, u):
+        return state @ self.Ad_T + np.multiply.outer(u, self.Bd)
+
+    def output(self, state):
+        return state[:, 0]
+
+def exact_discretization(A, B, dt):
+    """
+    Zero-order-hold discretization of x' = A x + B u: the exponential of
+    [[A, B], [0, 0]] * dt holds Ad = e^(A dt) and Bd = (integral of e^(A s) ds) B.
+    """
+    from scipy.linalg import expm
+
+    A = np.asarray(A, dtype=float)
+    B = np.asarray(B, dtype=float).reshape(-1, 1)
+    size = A.shape[0]
+    augmented = np.zeros((size + 1, size + 1))
+    augmented[:size, :size] = A
+    augmented[:size, size:] = B
+    transition = expm(augmented * dt)
+    return transition[:size, :size], transition[:size, size]
+
+class Integrator:
+    """y' = gain * u. With gain 1 this is the process main() simulates."""
+    def __init__(self, gain=1.0):
+        self.gain = gain
+
+    def discretize(self, dt):
+        return LinearPlant([[1.0]], [self.gain * dt])
+
+class FirstOrder:
+    """tau * y' + y = gain * u, e.g. a loaded servo's position following its command."""
+    def __init__(self, gain, tau):
+        self.gain = gain
+        self.tau = tau
+
+    def discretize(self, dt):
+        a = math.exp(-dt / self.tau)
+        return LinearPlant([[a]], [self.gain * (1 - a)])
+
+class SecondOrder:
+    """y'' + 2 zeta wn y' + wn^2 y = gain wn^2 u. States: position and velocity."""
+    def __init__(self, gain, wn, zeta):
+        self.gain = gain
+        self.wn = wn
+        self.zeta = zeta
+
+    def discretize(self, dt):
+        A = [[0.0, 1.0], [-self.wn ** 2, -2 * self.zeta * self.wn]]
+        B = [0.0, self.gain * self.wn ** 2]
+        return LinearPlant(*exact_discretization(A, B, dt), motion_states=[1])
+
+class FirstOrderDeadTime:
+    """
+    First order plus dead time: tau * y'(t) + y(t) = gain * u(t - dead_time).
+    The delay is exact for any dead time, also between samples: the state
+    holds the output and the last inputs in a shift register, and the input
+    delayed into the current step is split between the two samples it spans.
+    """
+    def __init__(self, gain, tau, dead_time):
+        self.gain = gain
+        self.tau = tau
+        self.dead_time = dead_time
+
+    def discretize(self, dt):
+        d = int(self.dead_time // dt)  # Whole samples of delay
+        fraction = self.dead_time - d * dt  # Part of a sample left over
+        a = math.exp(-dt / self.tau)
+        late = math.exp(-(dt - fraction) / self.tau)
+        b_new = self.gain * (1 - late)  # Weight of u[k-d], applied for dt - fraction
+        b_old = self.gain * late * (1 - math.exp(-fraction / self.tau))  # u[k-d-1], applied for fraction
+        # State: [y, u[k-1], ..., u[k-d-1]]
+        size = d + 2
+        Ad = np.zeros((size, size))
+        Bd = np.zeros(size)
+        Ad[0, 0] = a
+        if d == 0:
+            Bd[0] = b_new
+        else:
+            Ad[0, d] = b_new
+        Ad[0, d + 1] = b_old
+        Bd[1] = 1.0
+        for i in range(2, size):
+            Ad[i, i - 1] = 1.0  # Shift the input history
+        return LinearPlant(Ad, Bd)
+
+class RateLimited:
+    """
+    A servo that moves towards gain * u (its commanded position) at no more
+    than max_rate units per second, like a servo with a speed setting.
+    """
+    def __init__(self, max_rate, gain=1.0):
+        self.max_rate = max_rate
+        self.gain = gain
+
+    def discretize(self, dt):
+        return _DiscreteRateLimited(self.max_rate * dt, self.gain)
+
+class _DiscreteRateLimited:
+    def __init__(self, max_step, gain):
+        self.max_step = max_step
+        self.gain = gain
+
+    def reset(self, n, y0=0.0):
+        return np.full((n, 1), float(y0))
+
+    def step(self, state, u):
+        move = np.clip(self.gain * u - state[:, 0], -self.max_step, self.max_step)
+        return (state[:, 0] + move)[:, None]
+
+    def output(self, state):
+        return state[:, 0]
+
+class PositionSaturated:
+    """
+    Another plant whose output is held between min_pos and max_pos, like a
+    servo at its end stops. When the output hits a stop, the states the
+    discretized plant lists in motion_states (e.g. velocity) are zeroed.
+    """
+    def __init__(self, plant, min_pos, max_pos):
+        self.plant = plant
+        self.min_pos = min_pos
+        self.max_pos = max_pos
+
+    def discretize(self, dt):
+        return _DiscreteSaturated(self.plant.discretize(dt), self.min_pos, self.max_pos)
+
+class _DiscreteSaturated:
+    def __init__(self, plant, min_pos, max_pos):
+        self.plant = plant
+        self.min_pos = min_pos
+        self.max_pos = max_pos
+
+    def reset(self, n, y0=0.0):
+        return self.plant.reset(n, min(max(y0, self.min_pos), self.max_pos))
+
+    def step(self, state, u):
+        state = self.plant.step(state, u)
+        y = state[:, 0]
+        at_stop = (y < self.min_pos) | (y > self.max_pos)
+        if at_stop.any():
+            np.clip(y, self.min_pos, self.max_pos, out=y)
+            motion_states = getattr(self.plant, "motion_states", None)
+            if motion_states:
+                state[np.ix_(at_stop, motion_states)] = 0.0  # The stop kills the velocity
+        return state
+
+    def output(self, state):
+        return state[:, 0]
+
+# --- Fitting models to logged step responses ---
+# time and response are arrays from a step of size step_size applied at time 0
+# (e.g. from load_telemetry() in telemetry.py), with the response starting at rest.
+
+def _steady_change(response):
+    """Final change of the response, averaged over its last 10%."""
+    tail = max(1, len(response) // 10)
+    return float(np.mean(response[-tail:]) - response[0])
+
+def _crossing_time(time, response, level):
+    """First time the response (rising from response[0]) reaches the given change."""
+    change = np.asarray(response) - response[0]
+    if level < 0:
+        change, level = -change, -level
+    index = int(np.argmax(change >= level))
+    if change[index] < level:
+        raise ValueError("The response never reaches the requested level")
+    if index == 0:
+        return float(time[0])
+    t0, t1 = time[index - 1], time[index]
+    c0, c1 = change[index - 1], change[index]
+    return float(t0 + (t1 - t0) * (level - c0) / (c1 - c0))
+
+def fit_first_order(time, response, step_size):
+    """FirstOrder from the 63% rise time."""
+    change = _steady_change(response)
+    tau = _crossing_time(time, response, 0.632 * change) - time[0]
+    return FirstOrder(change / step_size, tau)
+
+def fit_first_order_dead_time(time, response, step_size):
+    """FirstOrderDeadTime by the two-point (28% / 63%) method."""
+    change = _steady_change(response)
+    t28 = _crossing_time(time, response, 0.283 * change) - time[0]
+    t63 = _crossing_time(time, response, 0.632 * change) - time[0]
+    tau = 1.5 * (t63 - t28)
+    return FirstOrderDeadTime(change / step_size, tau, max(t63 - tau, 0.0))
+
+def fit_second_order(time, response, step_size):
+    """SecondOrder from the overshoot and the time of the first peak (underdamped responses)."""
+    change = _steady_change(response)
+    shifted = (np.asarray(response) - response[0]) / change
+    peak_index = int(np.argmax(shifted))
+    overshoot = shifted[peak_index] - 1
+    if overshoot <= 0:
+        raise ValueError("No overshoot: fit a first order model instead")
+    log_overshoot = math.log(overshoot)
+    zeta = -log_overshoot / math.sqrt(math.pi ** 2 + log_overshoot ** 2)
+    peak_time = time[peak_index] - time[0]
+    wn = math.pi / (peak_time * math.sqrt(1 - zeta ** 2))
+    return SecondOrder(change / step_size, wn, zeta)
+
+def fit_rate_limit(time, response, step_size):
+    """RateLimited from the fastest logged movement."""
+    change = _steady_change(response)
+    rate = float(np.max(np.abs(np.diff(response) / np.diff(time))))
+    return RateLimited(rate, change / step_size)
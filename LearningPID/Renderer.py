@@ -0,0 +1,120 @@
+# File: Renderer.py
+import time
+
+import numpy as np
+import pygame
+
+# Above this many dirty rectangles, one full background blit and flip is cheaper
+FULL_REDRAW_RECTS = 300
+
+def sprite_size(radius):
+    """Side of the square sprite for a ball of this radius."""
+    return int(2 * radius) + 2
+
+class DirtyRenderer:
+    """
+    Draws the game like Game._draw, but only touches what changed.
+
+    The static background (screen color, box and border) is drawn once into
+    a surface, and each ball is a sprite pre-rendered once per (radius,
+    color). A frame restores the background under last frame's balls, blits
+    the balls at their new places and passes just those rectangles to
+    pygame.display.update(). With many balls (more than FULL_REDRAW_RECTS
+    rectangles) it switches to one full background blit and a flip.
+    """
+    def __init__(self, screen, config, box_rect):
+        self.screen = screen
+        self.background = pygame.Surface(screen.get_size())
+        self.background.fill(config.BLACK)
+        pygame.draw.rect(self.background, config.BOX_COLOR, box_rect)
+        pygame.draw.rect(self.background, config.BORDER_COLOR, box_rect, config.BORDER_WIDTH)
+        if pygame.display.get_surface() is not None:
+            self.background = self.background.convert()
+        self.sprites = {}
+        self.sprite_by_key = {}  # The same sprites, by the integer keys draw() uses
+        self.previous = None  # Ball rectangles drawn last frame (None: redraw everything)
+
+    def sprite(self, radius, color):
+        """The cached image of a ball, drawn with a colorkey so blits are cheap."""
+        color = tuple(color)  # draw() passes lists, which never equal the key color tuple
+        key = (radius, color)
+        image = self.sprites.get(key)
+        if image is None:
+            size = sprite_size(radius)
+            image = pygame.Surface((size, size))
+            key_color = (255, 0, 255) if color != (255, 0, 255) else (0, 255, 0)
+            image.fill(key_color)
+            pygame.draw.circle(image, color, (size / 2, size / 2), radius)
+            if pygame.display.get_surface() is not None:
+                image = image.convert()
+            image.set_colorkey(key_color, pygame.RLEACCEL)  # After convert(), which would drop the RLE
+            self.sprites[key] = image
+        return image
+
+    def invalidate(self):
+        """Redraw the whole screen next frame (e.g. after something else drew on it)."""
+        self.previous = None
+
+    def draw(self, xs, ys, radii, colors):
+        """
+        Draw balls given as arrays (or sequences) of center x, center y,
+        radius and (r, g, b) color.
+        """
+        screen = self.screen
+        radii = np.asarray(radii, dtype=float)
+        colors = np.asarray(colors, dtype=np.int64).reshape(-1, 3)
+        # One integer per (radius, color) to look the sprites up by
+        keys = (np.rint(radii * 16).astype(np.int64) << 24) | (colors[:, 0] << 16) | (colors[:, 1] << 8) | colors[:, 2]
+        key_list = keys.tolist()
+        sprites = self.sprite_by_key
+        for key in set(key_list).difference(sprites):
+            i = key_list.index(key)
+            sprites[key] = self.sprite(float(radii[i]), colors[i].tolist())
+        half = (np.floor(2 * radii) + 2) / 2  # sprite_size() / 2
+        lefts = np.floor(np.asarray(xs, dtype=float) - half + 0.5).astype(int).tolist()
+        tops = np.floor(np.asarray(ys, dtype=float) - half + 0.5).astype(int).tolist()
+        blits = list(zip(map(sprites.__getitem__, key_list), zip(lefts, tops)))
+
+        previous = self.previous
+        if previous is None or len(previous) + len(blits) > FULL_REDRAW_RECTS:
+            screen.blit(self.background, (0, 0))
+            if len(blits) > FULL_REDRAW_RECTS:
+                screen.blits(blits, doreturn=False)
+                self.previous = None  # Next frame is a full redraw too
+            else:
+                self.previous = screen.blits(blits)
+            pygame.display.flip()
+            return
+        background = self.background
+        screen.blits([(background, rect, rect) for rect in previous], doreturn=False)
+        self.previous = screen.blits(blits)
+        pygame.display.update(previous + self.previous)
+
+def compare(frames=300, agent_counts=(0, 100, 1000, 10000)):
+    """
+    Frame times of Game._draw with and without the DirtyRenderer, holding
+    RIGHT and D, for growing numbers of extra engine balls. Runs headless,
+    so it measures drawing, not the display.
+    """
+    from Game import Game
+
+    keys = {pygame.K_RIGHT, pygame.K_d}
+    for agents in agent_counts:
+        times = []
+        for dirty in (False, True):
+            game = Game(headless=True, engine=agents > 0, dirty_rects=dirty)
+            if agents:
+                game.add_agents(agents, seed=0)
+            elapsed = 0.0
+            for _ in range(frames):
+                game.step(keys)
+                start = time.perf_counter()
+                game._draw()
+                elapsed += time.perf_counter() - start
+            times.append(elapsed / frames * 1000)
+        print(f"{agents + 3:6d} balls: full redraw {times[0]:8.3f} ms/frame, "
+              f"dirty rects {times[1]:8.3f} ms/frame ({times[0] / times[1]:.1f}x)")
+    pygame.quit()
+
+if __name__ == '__main__':
+    compare()
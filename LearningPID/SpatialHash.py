@@ -0,0 +1,160 @@
+# File: SpatialHash.py
+import random
+import time
+
+class SpatialHash:
+    """
+    Uniform-grid spatial hash: every item (any hashable id) is filed under each
+    cell_size x cell_size grid cell its rectangle overlaps, so a query only
+    looks at items in the cells the query rectangle touches instead of at
+    every item. update() is incremental: an item that stays in the same cells
+    is not touched. Rectangles are (left, top, width, height) or pygame.Rects.
+    """
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.cells = {}  # (cell x, cell y) -> set of ids
+        self.items = {}  # id -> (first cell x, first cell y, last cell x, last cell y)
+
+    def _span(self, rect):
+        left, top, width, height = rect
+        size = self.cell_size
+        # The right and bottom edges are included, so a touching neighbour cell may be filed too
+        return int(left // size), int(top // size), int((left + width) // size), int((top + height) // size)
+
+    def _add(self, item, span):
+        cells = self.cells
+        x0, y0, x1, y1 = span
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                members = cells.get((cx, cy))
+                if members is None:
+                    cells[(cx, cy)] = {item}
+                else:
+                    members.add(item)
+
+    def _discard(self, item, span):
+        cells = self.cells
+        x0, y0, x1, y1 = span
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                members = cells[(cx, cy)]
+                members.discard(item)
+                if not members:
+                    del cells[(cx, cy)]
+
+    def update(self, item, rect):
+        """Insert item, or move it to rect if it is already in the hash."""
+        span = self._span(rect)
+        old = self.items.get(item)
+        if old == span:
+            return
+        if old is not None:
+            self._discard(item, old)
+        self._add(item, span)
+        self.items[item] = span
+
+    def remove(self, item):
+        span = self.items.pop(item, None)
+        if span is not None:
+            self._discard(item, span)
+
+    def query(self, rect):
+        """Ids of the items sharing a cell with rect (candidates; check the exact shapes)."""
+        cells = self.cells
+        x0, y0, x1, y1 = self._span(rect)
+        if x0 == x1 and y0 == y1:
+            return set(cells.get((x0, y0), ()))
+        found = set()
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                members = cells.get((cx, cy))
+                if members:
+                    found |= members
+        return found
+
+    def query_point(self, x, y):
+        """Ids of the items in the cell holding (x, y)."""
+        size = self.cell_size
+        return set(self.cells.get((int(x // size), int(y // size)), ()))
+
+    def pairs(self):
+        """Every pair of ids (as a sorted tuple) sharing at least one cell."""
+        found = set()
+        for members in self.cells.values():
+            if len(members) > 1:
+                ordered = sorted(members)
+                for i, a in enumerate(ordered):
+                    for b in ordered[i + 1:]:
+                        found.add((a, b))
+        return found
+
+def circles_overlap(x1, y1, r1, x2, y2, r2):
+    dx = x1 - x2
+    dy = y1 - y2
+    reach = r1 + r2
+    return dx * dx + dy * dy < reach * reach
+
+def benchmark(counts=(100, 1000, 5000, 20000), cell_size=50, radius=8, seed=0):
+    """
+    Per-frame collision cost against brute force: every ball against every
+    target (one target per 10 balls), and every ball against every other
+    ball, with each ball moving a few pixels per frame. The field grows with
+    the ball count (1000 balls on 600 x 400) so the density stays the same.
+    """
+    import pygame
+
+    rng = random.Random(seed)
+    print(f"{'balls':>6} {'targets':>7} {'hash targets':>13} {'brute targets':>14} "
+          f"{'hash pairs':>11} {'brute pairs':>12}")
+    for count in counts:
+        scale = (count / 1000) ** 0.5
+        width, height = 600 * scale, 400 * scale
+        balls = [[rng.uniform(0, width), rng.uniform(0, height)] for _ in range(count)]
+        targets = [pygame.Rect(rng.uniform(0, width - 50), rng.uniform(0, height - 50), 50, 50)
+                   for _ in range(max(1, count // 10))]
+        target_hash = SpatialHash(cell_size)
+        for i, rect in enumerate(targets):
+            target_hash.update(i, rect)
+        ball_hash = SpatialHash(cell_size)
+        size = 2 * radius
+
+        frames = 5
+        hashed_targets = hashed_pairs = 0.0
+        for _ in range(frames):
+            for ball in balls:
+                ball[0] = min(max(ball[0] + rng.uniform(-3, 3), 0), width)
+                ball[1] = min(max(ball[1] + rng.uniform(-3, 3), 0), height)
+            start = time.perf_counter()
+            hits = 0
+            for i, (x, y) in enumerate(balls):
+                rect = (x - radius, y - radius, size, size)
+                ball_hash.update(i, rect)
+                for t in target_hash.query(rect):
+                    if targets[t].colliderect(rect):
+                        hits += 1
+            hashed_targets += time.perf_counter() - start
+            start = time.perf_counter()
+            touching = sum(1 for a, b in ball_hash.pairs()
+                           if circles_overlap(balls[a][0], balls[a][1], radius, balls[b][0], balls[b][1], radius))
+            hashed_pairs += time.perf_counter() - start
+
+        brute_targets = brute_pairs = float("nan")
+        if count * len(targets) <= 3_000_000:
+            start = time.perf_counter()
+            brute_hits = 0
+            for x, y in balls:
+                rect = (x - radius, y - radius, size, size)
+                brute_hits += sum(1 for target in targets if target.colliderect(rect))
+            brute_targets = (time.perf_counter() - start) * 1000
+            assert brute_hits == hits, (brute_hits, hits)
+        if count <= 5000:
+            start = time.perf_counter()
+            brute_touching = sum(1 for i in range(count) for j in range(i + 1, count)
+                                 if circles_overlap(balls[i][0], balls[i][1], radius, balls[j][0], balls[j][1], radius))
+            brute_pairs = (time.perf_counter() - start) * 1000
+            assert brute_touching == touching, (brute_touching, touching)
+        print(f"{count:6d} {len(targets):7d} {hashed_targets / frames * 1000:10.2f} ms {brute_targets:11.2f} ms "
+              f"{hashed_pairs / frames * 1000:8.2f} ms {brute_pairs:9.2f} ms")
+
+if __name__ == '__main__':
+    benchmark()
@@ -1,5 +1,4 @@
 import time
-import matplotlib.pyplot as plt
 
 def pid_controller(setpoint, pv, kp, ki, kd, previous_error, integral, dt):
     error = setpoint - pv
@@ -8,7 +7,7 @@ def pid_controller(setpoint, pv, kp, ki, kd, previous_error, integral, dt):
     control = kp * error + ki * integral + kd * derivative
     return control, error, integral
 
-def main():
+def main(live=False, steps=100):
     setpoint = 100  # Desired setpoint
     pv = 0  # Initial process variable
     kp = 1.0  # Proportional gain
@@ -22,21 +21,114 @@ def main():
     pv_values = []
     control_values = []
     setpoint_values = []
+    if live:
+        # Plot while the run goes on, with bounded memory (see LivePlot.py)
+        from LivePlot import LivePlot
+        plot = LivePlot()
 
-    for i in range(100):  # Simulate for 100 time steps
+    for i in range(steps):  # Simulate for steps time steps
         control, error, integral = pid_controller(setpoint, pv, kp, ki, kd, previous_error, integral, dt)
         pv += control * dt  # Update process variable based on control output (simplified)
         previous_error = error
 
-        time_steps.append(i * dt)
-        pv_values.append(pv)
-        control_values.append(control)
-        setpoint_values.append(setpoint)
+        if live:
+            plot.add(i * dt, pv, control, setpoint)
+        else:
+            time_steps.append(i * dt)
+            pv_values.append(pv)
+            control_values.append(control)
+            setpoint_values.append(setpoint)
 
         time.sleep(dt)
-    graph(time_steps, pv_values, control_values, setpoint_values)
+    if live:
+        plot.show()
+    else:
+        graph(time_steps, pv_values, control_values, setpoint_values)
+
+SETTLE_BAND = 0.02  # Settled once within 2% of the step size
+RISE_LOW = 0.1  # Rise time is measured from 10% ...
+RISE_HIGH = 0.9  # ... to 90% of the step
+
+def batch_simulate(kp, ki, kd, setpoint, dt, steps=100, pv0=0.0, keep_traces=True, plant=None):
+    """
+    Simulates many PID configurations at once, without sleeping.
+
+    kp, ki, kd, setpoint and dt may each be a number or an array; they are
+    broadcast to one configuration per element. Every step runs pid_controller
+    on whole arrays with the same process as main() (pv += control * dt), or
+    with plant, a model from Plants.py (which needs one dt for all).
+
+    Returns a dict of NumPy arrays: per-configuration metrics "overshoot" (% of
+    the step), "rise_time" (10-90%), "settle_time" (into a 2% band), "ise" and
+    "iae" (nan where the response never got there), and, with keep_traces,
+    "pv" and "control" of shape (steps, configurations) plus "time".
+    """
+    import numpy as np
+
+    kp, ki, kd, setpoint, dt = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (kp, ki, kd, setpoint, dt)))
+    kp, ki, kd, setpoint, dt = (v.ravel() for v in (kp, ki, kd, setpoint, dt))
+    n = kp.size
+    pv = np.full(n, float(pv0))
+    previous_error = np.zeros(n)
+    integral = np.zeros(n)
+    step_size = setpoint - pv0
+    step_size[step_size == 0] = 1.0  # Avoid dividing by zero for a zero step
+    if plant is not None:
+        if np.ptp(dt) != 0:
+            raise ValueError("A plant model needs the same dt for every configuration")
+        discrete_plant = plant.discretize(float(dt[0]))
+        state = discrete_plant.reset(n, pv0)
+
+    peak = np.full(n, -np.inf)
+    low_index = np.full(n, -1)
+    high_index = np.full(n, -1)
+    last_outside = np.full(n, -1)
+    ise = np.zeros(n)
+    iae = np.zeros(n)
+    if keep_traces:
+        pv_trace = np.empty((steps, n))
+        control_trace = np.empty((steps, n))
+
+    for i in range(steps):
+        control, error, integral = pid_controller(setpoint, pv, kp, ki, kd, previous_error, integral, dt)
+        if plant is None:
+            pv = pv + control * dt
+        else:
+            state = discrete_plant.step(state, control)
+            pv = discrete_plant.output(state)
+        previous_error = error
+
+        ise += error * error * dt
+        iae += np.abs(error) * dt
+        progress = (pv - pv0) / step_size
+        np.maximum(peak, progress, out=peak)
+        low_index[(low_index < 0) & (progress >= RISE_LOW)] = i
+        high_index[(high_index < 0) & (progress >= RISE_HIGH)] = i
+        last_outside[np.abs(progress - 1) > SETTLE_BAND] = i
+        if keep_traces:
+            pv_trace[i] = pv
+            control_trace[i] = control
+
+    rise_time = np.where((low_index >= 0) & (high_index >= 0), (high_index - low_index) * dt, np.nan)
+    settled = last_outside < steps - 1
+    settle_time = np.where(settled, (last_outside + 1) * dt, np.nan)
+    result = {
+        "overshoot": np.maximum(peak - 1, 0) * 100,
+        "rise_time": rise_time,
+        "settle_time": settle_time,
+        "ise": ise,
+        "iae": iae,
+    }
+    if keep_traces:
+        result["time"] = np.arange(steps)[:, None] * dt
+        result["pv"] = pv_trace
+        result["control"] = control_trace
+    return result
 
 def graph ( time_steps, pv_values, control_values, setpoint_values ):
+    # Imported here so pid_controller can be used without matplotlib (e.g. on the robot)
+    import matplotlib.pyplot as plt
+
     plt.figure(figsize=(12, 6))
 
     plt.subplot(2, 1, 1)
@@ -58,4 +150,10 @@ def graph ( time_steps, pv_values, control_values, setpoint_values ):
     plt.show()
 
 if __name__ == '__main__':
-    main()
+    import sys
+
+    # "python main.py live [steps]" plots while running instead of at the end
+    if len(sys.argv) > 1 and sys.argv[1] == 'live':
+        main(live=True, steps=int(sys.argv[2]) if len(sys.argv) > 2 else 100)
+    else:
+        main()
@@ -0,0 +1,268 @@
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+# Run off-robot and without a window: the tracking code gets a SimBackend
+# instead of ARC, and pygame SDL's dummy video driver.
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+LEARNING_PID_DIR = os.path.join(REPO_DIR, "LearningPID")
+sys.path.insert(0, REPO_DIR)
+
+import eyeTracking # Also puts LearningPID on the path
+from robotBackend import SimBackend, still_path
+
+# --- Constants ---
+RESULTS_FILE = os.path.join(BENCH_DIR, "results.json")
+BASELINE_FILE = os.path.join(BENCH_DIR, "baseline.json")
+TOLERANCE = 0.25 # Worse than the baseline by more than this fraction counts as a regression
+REPEATS = 5 # Each measurement is repeated and the best run kept
+BALL_COUNTS = (0, 100, 1000, 10000) # Extra engine balls for the game benchmarks (0: the plain 3-ball game)
+IMPORT_MODULES = ("Game", "scipy.stats", "numpy", "pygame") # Cumulative import times reported for "import Game"
+
+def best_of(function, repeats=REPEATS):
+  """Shortest wall time (s) of repeats calls of function."""
+  best = float("inf")
+  for _ in range(repeats):
+    start = time.perf_counter()
+    function()
+    best = min(best, time.perf_counter() - start)
+  return best
+
+def result(value, unit, better="lower"):
+  return {"value": value, "unit": unit, "better": better}
+
+# --- Benchmarks ---
+# Each returns a dict of result name -> result().
+
+def bench_tracking(quick):
+  """Per-frame cost of adjust_neck_for_tracking in each mode, on a simulated robot."""
+  calls = 2000 if quick else 20000
+  results = {}
+  saved_mode = eyeTracking.TRACKING_MODE
+  for mode in ("pid", "step"):
+    eyeTracking.TRACKING_MODE = mode
+    sim = SimBackend(still_path(72))
+    with contextlib.redirect_stdout(io.StringIO()):
+      eyeTracking.use_backend(sim)
+      eyeTracking.initialize_head()
+    pin = eyeTracking.NECK_SERVO_PIN
+    centers = [eyeTracking.CAMERA_CENTER_X + (i % 200) - 100 for i in range(calls)]
+    period = eyeTracking.CONTROL_PERIOD
+
+    def run():
+      adjust = eyeTracking.adjust_neck_for_tracking
+      for x in centers:
+        sim.now += period
+        adjust(pin, x)
+    results[f"adjust_neck_for_tracking[{mode}]"] = result(best_of(run) / calls * 1e6, "us/frame")
+  eyeTracking.TRACKING_MODE = saved_mode
+  return results
+
+def bench_pid(quick):
+  """pid_controller steps per second, alone and batched, and the stateful controllers."""
+  learning_pid_main = eyeTracking.load_learning_pid("main")
+  pid_controller, batch_simulate = learning_pid_main.pid_controller, learning_pid_main.batch_simulate
+  from PIDController import PIDController, PIDBank
+
+  steps = 20000 if quick else 200000
+  kp, ki, kd, dt = 1.0, 0.1, 0.05, 0.01
+
+  def single():
+    pv, previous_error, integral = 0.0, 0.0, 0.0
+    for _ in range(steps):
+      control, previous_error, integral = pid_controller(100, pv, kp, ki, kd, previous_error, integral, dt)
+      pv += control * dt
+
+  controller = PIDController(kp, ki, kd, dt, setpoint=100)
+
+  def stateful():
+    controller.reset()
+    pv = 0.0
+    for _ in range(steps):
+      pv += controller.step(pv) * dt
+
+  bank = PIDBank(7, kp, ki, kd, dt, setpoint=100)
+
+  def banked():
+    bank.reset()
+    pv = bank.output.copy()
+    for _ in range(steps // 10):
+      pv = pv + bank.step(pv) * dt
+
+  configs = 1000 if quick else 10000
+  batch_steps = 100
+
+  def batched():
+    batch_simulate([kp] * configs, ki, kd, 100, dt, steps=batch_steps, keep_traces=False)
+
+  return {
+    "pid_controller single": result(steps / best_of(single), "steps/s", "higher"),
+    "pid_controller batched": result(configs * batch_steps / best_of(batched), "steps/s", "higher"),
+    "PIDController.step": result(steps / best_of(stateful), "steps/s", "higher"),
+    "PIDBank.step (7 loops)": result(steps // 10 * 7 / best_of(banked), "steps/s", "higher"),
+  }
+
+def bench_game(quick):
+  """Game._update and Game._draw frame times as the number of balls grows."""
+  import pygame
+  from Game import Game
+  from InputLog import PressedKeys
+
+  frames = 30 if quick else 120
+  keys = PressedKeys((pygame.K_RIGHT, pygame.K_d))
+  results = {}
+  for count in BALL_COUNTS[:3] if quick else BALL_COUNTS:
+    for dirty in (False, True):
+      game = Game(headless=True, engine=count > 0, dirty_rects=dirty)
+      if count:
+        game.add_agents(count, seed=0)
+      update_time = draw_time = 0.0
+      for _ in range(frames):
+        game._apply_input(keys)
+        start = time.perf_counter()
+        game._update()
+        middle = time.perf_counter()
+        game._draw()
+        end = time.perf_counter()
+        update_time += middle - start
+        draw_time += end - middle
+      balls = count + 3
+      if not dirty:
+        results[f"Game._update ({balls} balls)"] = result(update_time / frames * 1000, "ms/frame")
+        results[f"Game._draw ({balls} balls)"] = result(draw_time / frames * 1000, "ms/frame")
+      else:
+        results[f"Game._draw dirty rects ({balls} balls)"] = result(draw_time / frames * 1000, "ms/frame")
+  pygame.quit()
+  return results
+
+def _import_times():
+  """Cumulative import times (ms) of IMPORT_MODULES for a fresh "import Game", and the process wall time."""
+  start = time.perf_counter()
+  finished = subprocess.run([sys.executable, "-X", "importtime", "-c", "import Game"], cwd=LEARNING_PID_DIR,
+                            capture_output=True, text=True, check=True)
+  wall = time.perf_counter() - start
+  times = {}
+  for line in finished.stderr.splitlines():
+    if not line.startswith("import time:") or "|" not in line:
+      continue
+    _, cumulative, name = line[len("import time:"):].split("|")
+    name = name.strip()
+    if name in IMPORT_MODULES and cumulative.strip().isdigit():
+      times[name] = int(cumulative) / 1000
+  return times, wall
+
+def bench_import(quick):
+  """Cold-start time of importing Game.py (and what scipy.stats, numpy and pygame take of it)."""
+  repeats = 3 if quick else REPEATS
+  best = {}
+  best_wall = float("inf")
+  for _ in range(repeats):
+    times, wall = _import_times()
+    best_wall = min(best_wall, wall)
+    for name, value in times.items():
+      best[name] = min(best.get(name, float("inf")), value)
+  bare_start = time.perf_counter()
+  subprocess.run([sys.executable, "-c", "pass"], check=True)
+  bare = time.perf_counter() - bare_start
+  results = {f"import {name}": result(value, "ms") for name, value in best.items()}
+  results["python -c 'import Game' over bare start"] = result(max(best_wall - bare, 0.0) * 1000, "ms")
+  return results
+
+BENCHMARKS = {
+  "tracking": bench_tracking,
+  "pid": bench_pid,
+  "game": bench_game,
+  "import": bench_import,
+}
+
+# --- Reporting ---
+
+def git_commit():
+  try:
+    return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True,
+                          text=True, check=True).stdout.strip()
+  except (OSError, subprocess.CalledProcessError):
+    return None
+
+def compare(results, baseline, tolerance):
+  """Print each result against the baseline; returns the names that regressed by more than tolerance."""
+  regressions = []
+  for name, current in results.items():
+    previous = baseline.get(name)
+    if previous is None or not previous["value"]:
+      print(f"{name:<48} {current['value']:14.4g} {current['unit']:<10} (no baseline)")
+      continue
+    ratio = current["value"] / previous["value"]
+    # Positive change = worse
+    change = ratio - 1 if current["better"] == "lower" else 1 / ratio - 1 if ratio else float("inf")
+    flag = ""
+    if change > tolerance:
+      flag = "  REGRESSION"
+      regressions.append(name)
+    print(f"{name:<48} {current['value']:14.4g} {current['unit']:<10} "
+          f"{'worse' if change > 0 else 'better'} by {abs(change) * 100:5.1f}%{flag}")
+  return regressions
+
+def main():
+  parser = argparse.ArgumentParser(description="Benchmark the tracking, PID and game hot paths.")
+  parser.add_argument("benchmarks", nargs="*", help=f"which to run (default: all of {', '.join(BENCHMARKS)})")
+  parser.add_argument("--quick", action="store_true", help="fewer iterations and ball counts")
+  parser.add_argument("--output", default=RESULTS_FILE, help="JSON file for the results")
+  parser.add_argument("--baseline", default=BASELINE_FILE, help="JSON results to compare against")
+  parser.add_argument("--save-baseline", action="store_true", help="also store the results as the baseline")
+  parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="allowed fractional slowdown")
+  arguments = parser.parse_args()
+  unknown = [name for name in arguments.benchmarks if name not in BENCHMARKS]
+  if unknown:
+    parser.error(f"unknown benchmark(s) {', '.join(unknown)}; choose from {', '.join(BENCHMARKS)}")
+
+  results = {}
+  for name in arguments.benchmarks or BENCHMARKS:
+    print(f"Running {name} benchmarks...", flush=True)
+    results.update(BENCHMARKS[name](arguments.quick))
+  report = {
+    "meta": {
+      "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+      "commit": git_commit(),
+      "python": platform.python_version(),
+      "platform": platform.platform(),
+      "quick": arguments.quick,
+    },
+    "results": results,
+  }
+  with open(arguments.output, "w") as f:
+    json.dump(report, f, indent=2)
+  print(f"Wrote {len(results)} results to {arguments.output}")
+
+  baseline = {}
+  if os.path.exists(arguments.baseline) and not arguments.save_baseline:
+    with open(arguments.baseline) as f:
+      saved = json.load(f)
+    # Quick runs use fewer iterations and ball counts, so they are not comparable with full runs
+    if saved["meta"].get("quick", False) != arguments.quick:
+      kinds = {True: "--quick", False: "full"}
+      print(f"Warning: not comparing a {kinds[arguments.quick]} run with the {kinds[not arguments.quick]} "
+            f"baseline in {arguments.baseline}")
+    else:
+      baseline = saved["results"]
+  regressions = compare(results, baseline, arguments.tolerance)
+  if arguments.save_baseline:
+    with open(arguments.baseline, "w") as f:
+      json.dump(report, f, indent=2)
+    print(f"Saved the results as the baseline in {arguments.baseline}")
+  if regressions:
+    print(f"{len(regressions)} regression(s) beyond {arguments.tolerance * 100:.0f}%: {', '.join(regressions)}")
+    sys.exit(1)
+
+if __name__ == "__main__":
+  main()
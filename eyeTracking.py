@@ -1,7 +1,49 @@
 
+import importlib.util
+import math
+import os
+import sys
+import time
+
+# The PID code is shared with the LearningPID simulations; robotBackend sits next to this script.
+# REPO_DIR is the folder holding this script and LearningPID. Leave it as None to use the script's
+# own folder; set it (e.g. r"C:\FabLab") when the script is pasted into ARC, where __file__ is not defined.
+REPO_DIR = None
+if REPO_DIR is None:
+  if "__file__" not in globals():
+    raise RuntimeError("eyeTracking.py cannot tell where it was loaded from; set REPO_DIR at the top of the script to the folder holding robotBackend.py and LearningPID")
+  REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+# Appended rather than inserted first, so LearningPID's modules never shadow others of the same name.
+for _path in (REPO_DIR, os.path.join(REPO_DIR, "LearningPID")):
+  if _path not in sys.path:
+    sys.path.append(_path)
+
+def load_learning_pid(name):
+  """
+  Import LearningPID/<name>.py as the module learningpid_<name>. Used for
+  modules with generic names (main), which a plain import could resolve to
+  another module of that name earlier on sys.path.
+  """
+  module_name = "learningpid_" + name
+  if module_name not in sys.modules:
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(REPO_DIR, "LearningPID", name + ".py"))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+  return sys.modules[module_name]
+
+pid_controller = load_learning_pid("main").pid_controller
+from robotBackend import ArcBackend, SimBackend, SERVO_PORTS, sine_path
+from servoMirror import ServoMirror
+from targetFilter import TargetPredictor
+from gazeController import GazeController
+from yawPlanner import YawMap, YawPlanner
+from telemetry import TelemetryBuffer
+from FrameProfiler import FrameProfiler
+
 # --- Constants ---
 # Define constants for configuration values to make the code easier to read and modify.
-NECK_SERVO_PIN = D2 # Pin identifier for the neck servo (controls head pivot)
+NECK_SERVO_PIN = "D2" # Port of the neck servo (controls head pivot)
 INITIAL_NECK_POS = 94 # Starting position for the neck
 NECK_SPEED = 3 # Speed setting for the servo
 CAMERA_CENTER_X = 160 # Assumed horizontal center of the camera's view (30x240 camera, so 160 might be a typo, or based on a cropped/processed image width)
@@ -9,94 +51,569 @@ TRACKING_THRESHOLD = 70 # Minimum difference (delta) from center to trigger move
 NECK_STEP_SIZE = 10 # How much to move the neck servo each time
 NECK_MIN_POS = 42 # Minimum allowed servo position (most left for Neck-X)
 NECK_MAX_POS = 100 # Maximum allowed servo position (most right for Neck-X)
-SLEEP_TIME = 500 # Milliseconds to pause after a servo movement
+MOVE_SETTLE_TIME = 0.1 # Seconds before another step is issued (the loop keeps running meanwhile)
+
+# --- Tracking Mode Constants ---
+TRACKING_MODE = "pid" # "pid" for continuous neck tracking, "gaze" for eyes plus neck on both axes, "step" for the fixed-step fallback
+NECK_KP = 0.3 # Proportional gain (servo units per second per pixel of error)
+NECK_KI = 0.02 # Integral gain
+NECK_KD = 0.01 # Derivative gain
+PID_DEADBAND = 3 # Pixel errors this small are treated as zero so the neck does not twitch
+PID_MAX_DT = 0.25 # Longest time step (seconds) fed to the PID, e.g. after the target was lost
+CENTERED_TOLERANCE = 10 # Pixel error at which the object counts as centered (for the metrics)
+
+# --- Target Filter Constants ---
+FILTER_ENABLED = True # Filter and predict the object position instead of using the raw frame value
+CAMERA_PIXELS_PER_UNIT = 5.0 # Pixels the object shifts in the image per unit of neck movement (calibrate)
+CAMERA_LATENCY = 0.05 # Seconds from frame capture until $CameraObjectCenterX shows it
+PREDICTION_LEAD = 0.1 # Seconds ahead to predict, roughly the servo's response time
+FILTER_ALPHA = 0.5 # Alpha-beta filter position gain (higher trusts each frame more)
+FILTER_BETA = 0.15 # Alpha-beta filter velocity gain
+MAX_COAST_TIME = 0.6 # Seconds of dropouts to bridge on the estimate before giving up
+
+# --- Gaze Constants (TRACKING_MODE = "gaze") ---
+EYE_X_PIN = "D0" # Eye X-Axis servo (horizontal)
+EYE_Y_PIN = "D1" # Eye Y-Axis servo (vertical)
+NOD_PIN = "D5" # Inside neck piston (nodding), the vertical neck axis
+CAMERA_CENTER_Y = 120 # Vertical center of the camera's view
+EYE_SPEED = 0 # Eye servo speed (0 is fastest); the eyes make the quick corrections
+NOD_SPEED = 3 # Speed setting for the nodding piston
+
+# --- Control Loop Constants ---
+CONTROL_RATE_HZ = 20 # How many control ticks run per second
+CONTROL_PERIOD = 1.0 / CONTROL_RATE_HZ # Length of one tick in seconds (each tick must finish before its deadline)
+LOOP_REPORT_INTERVAL = 5.0 # Seconds between loop timing reports (missed deadlines and jitter)
+
+# --- Telemetry Constants ---
+TELEMETRY_CAPACITY = 12000 # Ticks kept in the telemetry buffer (10 minutes at 20 Hz)
+TELEMETRY_FILE = os.path.join(REPO_DIR, "tracking_telemetry.bin") # Written when the program exits
+DEBUG_PRINTS = False # Print every tracking delta and neck move (slow; the telemetry records them instead)
+PROFILE_ENABLED = False # Time each phase of the control tick (see LearningPID/FrameProfiler.py)
+PROFILE_FILE = os.path.join(REPO_DIR, "tracking_profile.txt") # Phase timing summary, written when the program exits
+
+# --- Simulation Constants ---
+SIM_DURATION = 30.0 # Simulated seconds for an off-robot run
+
+# The robot (or simulation) in use; see robotBackend.py and use_backend().
+backend = None
+# Cached state of all servos on the backend; commands go through it (see servoMirror.py).
+servo_mirror = None
+# Eye plus neck controller for the "gaze" mode (see gazeController.py).
+gaze = None
+# Coupled moves of the two yaw pistons, D3 and D4 (see yawPlanner.py).
+yaw_map = YawMap()
+yaw_planner = None
+
+# Per-tick record of the tracking (see telemetry.py).
+telemetry = TelemetryBuffer(TELEMETRY_CAPACITY)
+# Raw horizontal pixel error seen this tick (nan when there was none).
+_last_delta = math.nan
+
+# Time (monotonic seconds) after which the neck may be stepped again.
+_neck_ready_time = 0.0
 
 # --- Function Definitions ---
 
+def use_backend(new_backend):
+  """Select the robot (ArcBackend) or simulation (SimBackend) and reset the tracking state."""
+  global backend, servo_mirror, gaze, yaw_planner, _neck_ready_time
+  backend = new_backend
+  servo_mirror = ServoMirror(backend.servo, backend.monotonic)
+  gaze = GazeController(servo_mirror, (EYE_X_PIN, EYE_Y_PIN), (NECK_SERVO_PIN, NOD_PIN),
+                        neck_limits={NECK_SERVO_PIN: (NECK_MIN_POS, NECK_MAX_POS)})
+  yaw_planner = YawPlanner(servo_mirror, yaw_map, CONTROL_PERIOD)
+  target_x.reset()
+  target_y.reset()
+  _neck_ready_time = 0.0
+  neck_pid.reset()
+  tracking_metrics.lost()
+  tracking_metrics.start_run()
+  telemetry.clear()
+
 def initialize_neck(pin, start_pos, speed):
   """
   Sets the initial position and speed for the neck servo.
   Waits for the servo to reach the starting position.
   """
   print(f"Initializing neck servo on pin {pin}...")
-  Servo.SetPosition(pin, start_pos)
-  Servo.WaitForPositionEquals(pin, start_pos) # Wait for initial positioning
-  Servo.SetSpeed(pin, speed);
+  servo_mirror.set_position(pin, start_pos)
+  servo_mirror.flush()
+  backend.servo.WaitForPositionEquals(pin, start_pos) # Wait for initial positioning
+  servo_mirror.sync(pin)
+  servo_mirror.set_speed(pin, speed)
   print(f"Neck servo initialized to position {start_pos} with speed {speed}.")
 
+def initialize_eyes(speed):
+  """
+  Centers both eye servos and sets their speed, and sets the nodding piston's
+  speed, for the "gaze" mode. The nodding piston is left where it is.
+  """
+  print("Initializing eye servos...")
+  for pin in (EYE_X_PIN, EYE_Y_PIN):
+    servo_mirror.set_position(pin, gaze.eye_center[gaze.eye_ports.index(pin)])
+    servo_mirror.set_speed(pin, speed)
+  servo_mirror.set_speed(NOD_PIN, NOD_SPEED)
+  servo_mirror.flush()
+
+def initialize_head():
+  """Initializes the servos used by TRACKING_MODE."""
+  initialize_neck(NECK_SERVO_PIN, INITIAL_NECK_POS, NECK_SPEED)
+  if TRACKING_MODE == "gaze":
+    initialize_eyes(EYE_SPEED)
+
+def tilt_head(right_yaw_pos):
+  """
+  Tilts the head by moving the right yaw piston (D3) to right_yaw_pos, with
+  the left one (D4) following its calibrated mapping. The move is planned
+  now and streamed by the control loop; a plan that would break a limit
+  raises ValueError and nothing moves. Returns the number of ticks it takes.
+  """
+  return yaw_planner.start(right_yaw_pos)
+
 def adjust_neck_for_tracking(pin, object_center_x):
   """
-  Calculates the tracking error (delta) and adjusts the neck servo
-  left or right if the object is outside the threshold, respecting limits.
-  Correction: Swapped Increment/Decrement logic to ensure correct movement direction.
+  Calculates the tracking error (delta) and corrects the neck with the
+  controller selected by TRACKING_MODE: "pid" (continuous) or "step" (fallback).
   """
   # Calculate the difference between the object's horizontal center and the camera's assumed center.
   delta = object_center_x - CAMERA_CENTER_X
-  print(f"Tracking Delta: {delta}")
+  if DEBUG_PRINTS:
+    print(f"Tracking Delta: {delta}")
+
+  now = backend.monotonic()
+  if TRACKING_MODE == "pid":
+    neck_pid.update(pin, delta, now)
+  else:
+    step_neck(pin, delta, now)
 
-  current_pos = Servo.GetPosition(pin)
+def step_neck(pin, delta, now):
+  """
+  Step-based (bang-bang) tracking: moves the neck NECK_STEP_SIZE left or right
+  if the object is outside the threshold, respecting limits.
+  Correction: Swapped Increment/Decrement logic to ensure correct movement direction.
+  Servo commands do not block: after a step the neck is left to move for
+  MOVE_SETTLE_TIME while the control loop keeps reading the camera.
+  """
+  global _neck_ready_time
+  if now < _neck_ready_time:
+    return # The previous step is still being carried out
+
+  current_pos = servo_mirror.get_position(pin)
 
   # Object is significantly to the LEFT of camera center (negative delta)
   # -> Move the neck RIGHT (Increment servo position value towards NECK_MAX_POS)
   if delta < -TRACKING_THRESHOLD:
     if current_pos < NECK_MAX_POS: # Check if neck is not already at its maximum right position
-      print(f"Object Left ({delta}). Moving neck Right from {current_pos}.")
-      Servo.Increment(pin, NECK_STEP_SIZE) # Move servo to the right
-      sleep(SLEEP_TIME) # Pause to allow servo to move and system to stabilize
+      if DEBUG_PRINTS:
+        print(f"Object Left ({delta}). Moving neck Right from {current_pos}.")
+      servo_mirror.set_position(pin, min(current_pos + NECK_STEP_SIZE, NECK_MAX_POS)) # Move servo to the right
+      _neck_ready_time = now + MOVE_SETTLE_TIME # Let the servo move without blocking the loop
     else:
-      print(f"Object Left ({delta}), but neck already at max right limit ({current_pos}).")
+      if DEBUG_PRINTS:
+        print(f"Object Left ({delta}), but neck already at max right limit ({current_pos}).")
 
   # Object is significantly to the RIGHT of camera center (positive delta)
   # -> Move the neck LEFT (Decrement servo position value towards NECK_MIN_POS)
   elif delta > TRACKING_THRESHOLD:
     if current_pos > NECK_MIN_POS: # Check if neck is not already at its maximum left position
-      print(f"Object Right ({delta}). Moving neck Left from {current_pos}.")
-      Servo.Decrement(pin, NECK_STEP_SIZE) # Move servo to the left
-      sleep(SLEEP_TIME) # Pause
+      if DEBUG_PRINTS:
+        print(f"Object Right ({delta}). Moving neck Left from {current_pos}.")
+      servo_mirror.set_position(pin, max(current_pos - NECK_STEP_SIZE, NECK_MIN_POS)) # Move servo to the left
+      _neck_ready_time = now + MOVE_SETTLE_TIME
     else:
-      print(f"Object Right ({delta}), but neck already at min left limit ({current_pos}).")
+      if DEBUG_PRINTS:
+        print(f"Object Right ({delta}), but neck already at min left limit ({current_pos}).")
 
   # Object is within the central threshold (close to center)
   else:
     # print(f"Object centered ({delta}). Holding position {current_pos}.") # Optional: for debugging
     pass # Do nothing if the object is centered
 
+class PIDNeckController:
+  """
+  Continuous neck tracking built on pid_controller from LearningPID/main.py.
+  The setpoint is a pixel error of zero; the controller output is a neck
+  velocity (servo units per second) that is integrated into an absolute
+  target and clamped to the neck limits. While the target is held at a limit
+  the integral is not updated (anti-windup).
+  """
+  def __init__(self, kp, ki, kd, min_pos, max_pos):
+    self.kp = kp
+    self.ki = ki
+    self.kd = kd
+    self.min_pos = min_pos
+    self.max_pos = max_pos
+    self.reset()
+
+  def reset(self):
+    """Forget the controller state, e.g. when the target is lost."""
+    self.target = None
+    self.integral = 0.0
+    self.previous_error = None
+    self.last_time = None
+
+  def update(self, pin, delta, now):
+    """Run one PID step for a pixel error delta and command the new neck target."""
+    if self.target is None:
+      self.target = servo_mirror.get_position(pin)
+    dt = CONTROL_PERIOD if self.last_time is None else min(now - self.last_time, PID_MAX_DT)
+    self.last_time = now
+    if dt <= 0:
+      return
+
+    measured = 0 if abs(delta) <= PID_DEADBAND else delta
+    # Object LEFT of center (negative delta) gives a positive error -> neck moves RIGHT (higher position)
+    previous_error = -measured if self.previous_error is None else self.previous_error
+    control, error, integral = pid_controller(0, measured, self.kp, self.ki, self.kd,
+                                              previous_error, self.integral, dt)
+    self.previous_error = error
+
+    target = self.target + control * dt
+    if target >= self.max_pos:
+      target = self.max_pos
+      saturated = control > 0
+    elif target <= self.min_pos:
+      target = self.min_pos
+      saturated = control < 0
+    else:
+      saturated = False
+    if not saturated:
+      self.integral = integral
+    self.target = target
+
+    servo_mirror.set_position(pin, target) # Sent as one absolute command at the end of the tick
+
+class TrackingMetrics:
+  """
+  Measures how well the tracker centers the object: time-to-center (from
+  acquiring the object, or from it jumping outside TRACKING_THRESHOLD, until
+  it is within CENTERED_TOLERANCE) and the steady-state error once centered.
+  """
+  def __init__(self, tolerance=CENTERED_TOLERANCE):
+    self.tolerance = tolerance
+    self.acquired_at = None
+    self.centered = False
+    self.start_run()
+
+  def start_run(self):
+    """Clear the totals kept for the whole run (see summary())."""
+    self.run_times_to_center = []
+    self.run_error_total = 0.0
+    self.run_samples = 0
+    self.reset()
+
+  def reset(self):
+    """Start a new reporting window (the current acquisition carries over)."""
+    self.times_to_center = []
+    self.steady_error_total = 0.0
+    self.steady_samples = 0
+
+  def lost(self):
+    """The camera lost the object; the next frame starts a new acquisition."""
+    self.acquired_at = None
+    self.centered = False
+
+  def update(self, delta, now):
+    """Record the raw pixel error of a camera frame."""
+    error = abs(delta)
+    self.run_error_total += error
+    self.run_samples += 1
+    if self.acquired_at is None or (self.centered and error > TRACKING_THRESHOLD):
+      self.acquired_at = now
+      self.centered = False
+    if self.centered:
+      self.steady_error_total += error
+      self.steady_samples += 1
+    elif error <= self.tolerance:
+      self.centered = True
+      self.times_to_center.append(now - self.acquired_at)
+      self.run_times_to_center.append(now - self.acquired_at)
+
+  def summary(self):
+    """Run totals: (number of centerings, mean time-to-center in s, mean pixel error over all frames)."""
+    times = self.run_times_to_center
+    mean_time = sum(times) / len(times) if times else None
+    mean_error = self.run_error_total / self.run_samples if self.run_samples else None
+    return len(times), mean_time, mean_error
+
+  def report(self):
+    """Print a one-line summary and start a new reporting window."""
+    if self.times_to_center:
+      mean_time = sum(self.times_to_center) / len(self.times_to_center)
+      center_text = f"{len(self.times_to_center)} centerings, mean time-to-center {mean_time:.2f} s"
+    else:
+      center_text = "no new centerings"
+    if self.steady_samples:
+      steady_text = f"steady-state error {self.steady_error_total / self.steady_samples:.1f} px"
+    else:
+      steady_text = "no steady-state samples"
+    print(f"Tracking ({TRACKING_MODE}): {center_text}, {steady_text}")
+    self.reset()
+
+neck_pid = PIDNeckController(NECK_KP, NECK_KI, NECK_KD, NECK_MIN_POS, NECK_MAX_POS)
+tracking_metrics = TrackingMetrics()
+target_x = TargetPredictor(CAMERA_CENTER_X, CAMERA_PIXELS_PER_UNIT, CAMERA_LATENCY, PREDICTION_LEAD,
+                           FILTER_ALPHA, FILTER_BETA, MAX_COAST_TIME)
+target_y = TargetPredictor(CAMERA_CENTER_Y, CAMERA_PIXELS_PER_UNIT, CAMERA_LATENCY, PREDICTION_LEAD,
+                           FILTER_ALPHA, FILTER_BETA, MAX_COAST_TIME)
+
+class LoopStats:
+  """
+  Collects timing statistics for the fixed-rate control loop:
+  missed deadlines, start-time jitter and how long each tick's work took.
+  """
+  def __init__(self, period):
+    self.period = period
+    self.reset()
+
+  def reset(self):
+    self.ticks = 0
+    self.missed_deadlines = 0
+    self.max_jitter = 0.0
+    self.total_jitter = 0.0
+    self.max_work_time = 0.0
+
+  def record(self, scheduled_start, actual_start, end):
+    """Record one tick that was scheduled to start at scheduled_start."""
+    jitter = actual_start - scheduled_start
+    work_time = end - actual_start
+    self.ticks += 1
+    self.total_jitter += jitter
+    if jitter > self.max_jitter:
+      self.max_jitter = jitter
+    if work_time > self.max_work_time:
+      self.max_work_time = work_time
+    if end > scheduled_start + self.period:
+      self.missed_deadlines += 1
+
+  def report(self):
+    """Print a one-line summary and start a new reporting window."""
+    if self.ticks == 0:
+      return
+    mean_jitter = self.total_jitter / self.ticks
+    print(f"Loop: {self.ticks} ticks, {self.missed_deadlines} missed deadlines, "
+          f"jitter mean {mean_jitter * 1000:.2f} ms / max {self.max_jitter * 1000:.2f} ms, "
+          f"max tick work {self.max_work_time * 1000:.2f} ms")
+    self.reset()
+
+def gaze_tick():
+  """
+  One control tick of the "gaze" mode: reads both object coordinates, turns
+  them into the object's direction on each axis (predicted with
+  FILTER_ENABLED) and lets the gaze controller split the move between the
+  eyes and the neck.
+  """
+  if not backend.get_var("$CameraIsTracking"):
+    tracking_metrics.lost()
+    gaze.reset()
+    target_x.reset()
+    target_y.reset()
+    return
+  global _last_delta
+  obj_x = backend.get_var("$CameraObjectCenterX")
+  obj_y = backend.get_var("$CameraObjectCenterY")
+  now = backend.monotonic()
+  if obj_x is not None:
+    _last_delta = obj_x - CAMERA_CENTER_X
+  if obj_x is not None and obj_y is not None:
+    tracking_metrics.update(math.hypot(obj_x - CAMERA_CENTER_X, obj_y - CAMERA_CENTER_Y), now)
+
+  directions = []
+  for measured, center, predictor, camera_direction in zip(
+      (obj_x, obj_y), (CAMERA_CENTER_X, CAMERA_CENTER_Y), (target_x, target_y), gaze.camera_directions()):
+    if not FILTER_ENABLED:
+      directions.append(None if measured is None else
+                        camera_direction - (measured - center) / CAMERA_PIXELS_PER_UNIT)
+      continue
+    if measured is not None:
+      predictor.update(measured, camera_direction, now)
+    directions.append(predictor.direction(now)) # Coasts through dropouts
+  gaze.update(directions, CONTROL_PERIOD)
+
+def tracking_tick(pin):
+  """
+  One control tick: read the camera and, if an object is tracked,
+  issue a (non-blocking) neck correction. With FILTER_ENABLED the neck is
+  aimed at the predicted object position, and dropouts coast on the estimate.
+  """
+  global _last_delta
+  _last_delta = math.nan
+  if TRACKING_MODE == "gaze":
+    gaze_tick()
+    return
+
+  # Check if the camera is currently tracking an object
+  # (Assumes getVar("$CameraIsTracking") returns a boolean or equivalent)
+  if backend.get_var("$CameraIsTracking"):
+    # Get the horizontal center position (x-coordinate) of the tracked object
+    # (Assumes getVar("$CameraObjectCenterX") returns the x-coordinate)
+    obj_x = backend.get_var("$CameraObjectCenterX")
+    now = backend.monotonic()
+
+    # Ensure a valid position was retrieved
+    if obj_x is not None:
+      _last_delta = obj_x - CAMERA_CENTER_X
+      tracking_metrics.update(_last_delta, now)
+      if FILTER_ENABLED:
+        obj_x = target_x.update(obj_x, servo_mirror.get_position(pin), now)
+      # Adjust the neck position based on the object's (predicted) x-coordinate
+      adjust_neck_for_tracking(pin, obj_x)
+      return
+
+    predicted_x = target_x.coast(servo_mirror.get_position(pin), now) if FILTER_ENABLED else None
+    if predicted_x is not None:
+      # Dropout: keep following the estimate
+      adjust_neck_for_tracking(pin, predicted_x)
+    else:
+      # Log a warning if the object's center X could not be retrieved
+      print("Warning: Could not retrieve $CameraObjectCenterX")
+  else:
+    tracking_metrics.lost()
+    neck_pid.reset()
+    target_x.reset()
+
+def run_tracking_loop(pin, period=CONTROL_PERIOD, duration=None):
+  """
+  Runs tracking_tick at a fixed rate. Each tick has a deadline one period
+  after its scheduled start; the loop sleeps until the next tick instead of
+  busy-polling. Servo commands are not waited on, so the servo travels while
+  the next camera frames are read. Late ticks are counted as missed deadlines
+  and the schedule skips ahead rather than trying to catch up.
+  Runs forever unless a duration (seconds) is given.
+  """
+  stats = LoopStats(period)
+  profiler = FrameProfiler(("camera", "yaw", "flush", "telemetry", "report", "sleep"), enabled=PROFILE_ENABLED)
+  next_tick = backend.monotonic()
+  next_report = next_tick + LOOP_REPORT_INTERVAL
+  end_time = None if duration is None else next_tick + duration
+  try:
+    while end_time is None or next_tick < end_time:
+      profiler.start_frame()
+      tick_start = backend.monotonic()
+      tracking_tick(pin)
+      profiler.mark("camera")
+      yaw_planner.tick()
+      profiler.mark("yaw")
+      servo_mirror.flush()
+      profiler.mark("flush")
+      tick_end = backend.monotonic()
+      stats.record(next_tick, tick_start, tick_end)
+      telemetry.record(tick_start, _last_delta, servo_mirror.commanded[pin],
+                       servo_mirror.get_position(pin), tick_end - tick_start) # Mirror's estimate, no servo read
+      profiler.mark("telemetry")
+
+      if tick_end >= next_report:
+        stats.report()
+        tracking_metrics.report()
+        servo_mirror.report()
+        next_report = tick_end + LOOP_REPORT_INTERVAL
+      profiler.mark("report")
+
+      next_tick += period
+      if tick_end > next_tick:
+        # Overran into the next tick(s): drop them and resynchronise
+        skipped = int((tick_end - next_tick) / period) + 1
+        next_tick += skipped * period
+      backend.sleep(max(0.0, next_tick - backend.monotonic()))
+      profiler.mark("sleep")
+      profiler.end_frame()
+  finally:
+    profiler.write_summary(PROFILE_FILE) # Does nothing unless PROFILE_ENABLED
+
+  # Final reports for a run of fixed duration
+  stats.report()
+  tracking_metrics.report()
+  servo_mirror.report()
+
+def run_simulation(path, duration=SIM_DURATION, seed=None, telemetry_file=None, **camera_options):
+  """
+  Runs the tracking loop off-robot against a SimBackend whose camera follows
+  path (see robotBackend.py), as fast as possible on the virtual clock.
+  Prints the throughput, optionally dumps the telemetry to telemetry_file,
+  and returns the simulation for inspection.
+  """
+  sim = SimBackend(path, seed=seed, **camera_options)
+  use_backend(sim)
+  initialize_head()
+  wall_start = time.perf_counter()
+  sim_start = sim.monotonic()
+  run_tracking_loop(NECK_SERVO_PIN, duration=duration)
+  wall_time = time.perf_counter() - wall_start
+  ticks = int(round((sim.monotonic() - sim_start) / CONTROL_PERIOD))
+  print(f"Simulated {sim.monotonic() - sim_start:.1f} s in {wall_time:.3f} s wall time "
+        f"({ticks / wall_time:.0f} ticks/s, {(sim.monotonic() - sim_start) / wall_time:.0f}x real time)")
+  if telemetry_file is not None:
+    telemetry.dump(telemetry_file)
+  return sim
+
+def compare_settings(variants, path, duration=SIM_DURATION, seed=None, **camera_options):
+  """
+  Tracks the same simulated path once per variant, a (name, settings) pair
+  where settings maps constants of this script to the values to run with,
+  and prints time-to-center and mean pixel error for each.
+  """
+  results = {}
+  for name, settings in variants:
+    saved = {key: globals()[key] for key in settings}
+    globals().update(settings)
+    try:
+      run_simulation(path, duration, seed=seed, **camera_options)
+      results[name] = tracking_metrics.summary()
+    finally:
+      globals().update(saved)
+  for name, (centerings, mean_time, mean_error) in results.items():
+    time_text = "n/a" if mean_time is None else f"{mean_time:.2f} s"
+    error_text = "n/a" if mean_error is None else f"{mean_error:.1f} px"
+    print(f"{name:>10}: {centerings} centerings, mean time-to-center {time_text}, mean error {error_text}")
+  return results
+
+def compare_filtering(path, duration=SIM_DURATION, seed=None, **camera_options):
+  """Tracks the same simulated path with raw camera values and with the target filter."""
+  return compare_settings((("raw", {"FILTER_ENABLED": False}), ("filtered", {"FILTER_ENABLED": True})),
+                          path, duration, seed, **camera_options)
+
+def compare_gaze(path, duration=SIM_DURATION, seed=None, **camera_options):
+  """Tracks the same simulated path with the neck alone and with eyes plus neck."""
+  return compare_settings((("neck only", {"TRACKING_MODE": "pid"}), ("gaze", {"TRACKING_MODE": "gaze"})),
+                          path, duration, seed, **camera_options)
+
+def main(robot):
+  """Track objects on the given backend until interrupted."""
+  use_backend(robot)
+
+  # Initialize the neck (and for "gaze" the eye) servos once at the start of the program
+  initialize_head()
+
+  print(f"Starting tracking loop at {CONTROL_RATE_HZ} Hz...")
+  try:
+    # Main control loop that runs continuously at a fixed rate
+    run_tracking_loop(NECK_SERVO_PIN)
+
+  except KeyboardInterrupt:
+    # Handle a Ctrl+C command to gracefully exit the program
+    print("\nExiting program due to user request.")
+    records = telemetry.dump(TELEMETRY_FILE)
+    print(f"Wrote {records} telemetry records to {TELEMETRY_FILE}")
+    # Optional: Add cleanup code here, such as returning the servo to a neutral position.
+    # servo_mirror.set_position(NECK_SERVO_PIN, INITIAL_NECK_POS)
+    # servo_mirror.flush()
+
+def arc_backend():
+  """
+  The ARC backend when this script runs inside ARC, which injects Servo,
+  getVar and the port constants D0..D6 as globals; None anywhere else.
+  """
+  try:
+    ports = {port: globals()[port] for port in SERVO_PORTS}
+    return ArcBackend(Servo, getVar, ports)
+  except (KeyError, NameError):
+    return None
+
 # --- Main Program Logic ---
 
-# Initialize the neck servo system once at the start of the program
-initialize_neck(NECK_SERVO_PIN, INITIAL_NECK_POS, NECK_SPEED)
-
-print("Starting tracking loop...")
-try:
-  # Main control loop that runs continuously
-  while True:
-    # Check if the camera is currently tracking an object
-    # (Assumes getVar("$CameraIsTracking") returns a boolean or equivalent)
-    if getVar("$CameraIsTracking"):
-      # Get the horizontal center position (x-coordinate) of the tracked object
-      # (Assumes getVar("$CameraObjectCenterX") returns the x-coordinate)
-      obj_x = getVar("$CameraObjectCenterX")
-
-      # Ensure a valid position was retrieved
-      if obj_x is not None:
-        # Adjust the neck position based on the object's detected x-coordinate
-        adjust_neck_for_tracking(NECK_SERVO_PIN, obj_x)
-      else:
-        # Log a warning if the object's center X could not be retrieved
-        print("Warning: Could not retrieve $CameraObjectCenterX")
-        # Optional: Consider adding a small delay here if this warning occurs frequently
-        # import time
-        # time.sleep(0.1)
-
-    # Optional: If the camera is not tracking, a small delay can prevent the loop
-    # from consuming excessive CPU resources.
-    # else:
-      # import time
-      # time.sleep(0.05)
-
-except KeyboardInterrupt:
-  # Handle a Ctrl+C command to gracefully exit the program
-  print("\nExiting program due to user request.")
-  # Optional: Add cleanup code here, such as returning the servo to a neutral position.
-  # Servo.SetPosition(NECK_SERVO_PIN, INITIAL_NECK_POS)
-  # Servo.WaitForMove(NECK_SERVO_PIN) # Or Servo.WaitForPositionEquals
+ARC = arc_backend()
+if ARC is not None:
+  main(ARC)
+elif __name__ == "__main__":
+  # Off-robot: track a simulated object swinging across the neck's range
+  run_simulation(sine_path(72, 25, 8.0))
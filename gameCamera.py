@@ -0,0 +1,199 @@
+
+import math
+import time
+
+import pygame
+
+import eyeTracking
+from robotBackend import SimBackend, CAMERA_WIDTH, CAMERA_HEIGHT
+# eyeTracking has put LearningPID on the path
+import InputLog
+from Game import Game
+
+# --- Constants ---
+# Servo directions the edges of the game's big box map to. Horizontal is the
+# neck pivot (D2), vertical the nodding piston (D5); both stay inside the
+# tracking limits in eyeTracking.py.
+GAME_PAN_RANGE = (48, 96)
+GAME_TILT_RANGE = (70, 130)
+GAME_DURATION = 60.0 # Simulated seconds for a closed-loop run
+MAX_LATENCY = 1.0 # Longest head lag (s) looked for when estimating latency
+
+def patrol_inputs(frame, fps=60):
+  """
+  Default keys for ball1 (the target): a repeating 8 s patrol of holds and
+  pauses, right, left, up and down, so the head sees steps and ramps.
+  """
+  phase = (frame / fps) % 8.0
+  if phase < 1.5:
+    return {pygame.K_RIGHT}
+  if 2.0 <= phase < 3.5:
+    return {pygame.K_LEFT}
+  if 4.0 <= phase < 4.8:
+    return {pygame.K_UP, pygame.K_RIGHT}
+  if 5.5 <= phase < 6.3:
+    return {pygame.K_DOWN, pygame.K_LEFT}
+  return ()
+
+class GamePath:
+  """
+  A SimCamera path driven by the LearningPID game: when the camera captures
+  a frame at time t, the (headless) game is stepped at its fixed FPS until it
+  reaches t, and ball1's position in the big box is mapped linearly onto
+  GAME_PAN_RANGE (and GAME_TILT_RANGE with two_axis) as the direction the
+  head must point to center it.
+
+  inputs are the keys held for ball1 and ball2: a set, a function of the
+  frame number, or an InputLog recording (nothing is held after its end).
+  Each capture also stores the target and where the simulated head (neck
+  plus eye) pointed, for tracking_report().
+  """
+  def __init__(self, game, inputs=patrol_inputs, two_axis=False):
+    self.game = game
+    if isinstance(inputs, InputLog.InputLog):
+      frames = inputs.frames
+      inputs = lambda frame: InputLog.FRAME_KEYS[frames[frame]] if frame < len(frames) else ()
+    self.inputs = inputs
+    self.two_axis = two_axis
+    left, top, right, bottom = game.box_rect.left, game.box_rect.top, game.box_rect.right, game.box_rect.bottom
+    border = game.config.BORDER_WIDTH + game.config.BALL_RADIUS
+    self.x_range = (left + border, right - border)
+    self.y_range = (top + border, bottom - border)
+    self.sim = None
+    self.samples = [] # (t, target x, head x, target y, head y) per captured frame
+
+  def bind(self, sim):
+    """The simulation whose head is tracking this path."""
+    self.sim = sim
+
+  def _to_direction(self, position, game_range, servo_range):
+    fraction = (position - game_range[0]) / (game_range[1] - game_range[0])
+    return servo_range[0] + fraction * (servo_range[1] - servo_range[0])
+
+  def _to_game(self, direction, game_range, servo_range):
+    fraction = (direction - servo_range[0]) / (servo_range[1] - servo_range[0])
+    return game_range[0] + fraction * (game_range[1] - game_range[0])
+
+  def __call__(self, t):
+    game = self.game
+    inputs = self.inputs
+    while game.game_time() < t:
+      game.step(inputs(game.frame) if callable(inputs) else inputs)
+    x, y = game.ball1.get_position()
+    target_x = self._to_direction(x, self.x_range, GAME_PAN_RANGE)
+    target_y = self._to_direction(y, self.y_range, GAME_TILT_RANGE) if self.two_axis else None
+    if self.sim is not None:
+      camera = self.sim.camera
+      head_x = camera.direction(camera.pan_port, camera.eye_x_port, t)
+      head_y = camera.direction(camera.tilt_port, camera.eye_y_port, t) if self.two_axis else None
+      self.samples.append((t, target_x, head_x, target_y, head_y))
+    return (target_x, target_y) if self.two_axis else target_x
+
+  def head_view(self, surface):
+    """Game.overlay: outline the camera's field of view where the head points."""
+    if not self.samples:
+      return
+    _, _, head_x, _, head_y = self.samples[-1]
+    units_per_pixel = 1 / self.sim.camera.pixels_per_unit
+    center_x = self._to_game(head_x, self.x_range, GAME_PAN_RANGE)
+    width = self._to_game(GAME_PAN_RANGE[0] + CAMERA_WIDTH * units_per_pixel, self.x_range, GAME_PAN_RANGE) - self.x_range[0]
+    if self.two_axis:
+      center_y = self._to_game(head_y, self.y_range, GAME_TILT_RANGE)
+      height = (self._to_game(GAME_TILT_RANGE[0] + CAMERA_HEIGHT * units_per_pixel, self.y_range, GAME_TILT_RANGE)
+                - self.y_range[0])
+    else:
+      center_y, height = sum(self.y_range) / 2, self.y_range[1] - self.y_range[0]
+    rect = pygame.Rect(0, 0, width, height)
+    rect.center = (center_x, center_y)
+    pygame.draw.rect(surface, self.game.config.GREEN, rect, 2)
+    pygame.draw.line(surface, self.game.config.GREEN, (center_x, rect.top), (center_x, rect.bottom))
+
+def _percentile(values, fraction):
+  ordered = sorted(values)
+  return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def tracking_report(path):
+  """
+  Error and latency of the head against the target over a run, from the
+  path's samples: pointing error in servo units (mean, p95, max), and the
+  head's lag behind the target, taken as the delay (up to MAX_LATENCY) that
+  best lines the target's trajectory up with the head's.
+  """
+  samples = path.samples
+  if len(samples) < 2:
+    return None
+  errors = [abs(s[2] - s[1]) if not path.two_axis else math.hypot(s[2] - s[1], s[4] - s[3]) for s in samples]
+  period = (samples[-1][0] - samples[0][0]) / (len(samples) - 1)
+  best_shift, best_error = 0, math.inf
+  for shift in range(int(MAX_LATENCY / period) + 1):
+    pairs = zip(samples[:len(samples) - shift], samples[shift:])
+    total = sum((head[2] - target[1]) ** 2 for target, head in pairs)
+    mean = total / (len(samples) - shift)
+    if mean < best_error:
+      best_shift, best_error = shift, mean
+  return {
+    "mean_error": sum(errors) / len(errors),
+    "p95_error": _percentile(errors, 0.95),
+    "max_error": max(errors),
+    "latency": best_shift * period,
+    "lagged_error": math.sqrt(best_error),
+  }
+
+def run_game_tracking(duration=GAME_DURATION, inputs=patrol_inputs, mode=None, render=False, seed=None,
+                      **camera_options):
+  """
+  Closed loop: the game world stands in for the camera and eyeTracking's
+  controller (TRACKING_MODE, or mode: "pid", "gaze" or "step") drives the
+  simulated head. Headless it runs on the virtual clock, as fast as the code
+  allows; with render the game window shows ball1 and the head's view in
+  real time. Prints the usual loop and tracking reports, then pointing
+  error and latency, and returns tracking_report()'s dict.
+  """
+  saved_mode = eyeTracking.TRACKING_MODE
+  if mode is not None:
+    eyeTracking.TRACKING_MODE = mode
+  try:
+    game = Game(headless=not render)
+    path = GamePath(game, inputs, two_axis=eyeTracking.TRACKING_MODE == "gaze")
+    if render:
+      game.overlay = path.head_view
+      # Draw each captured frame and hold it until its time has come
+      render_start = []
+      def path_function(t):
+        target = path(t)
+        game._handle_events()
+        game._draw()
+        if not render_start:
+          render_start.append(time.perf_counter() - t)
+        time.sleep(max(0.0, render_start[0] + t - time.perf_counter()))
+        return target
+    else:
+      path_function = path
+    sim = SimBackend(path_function, seed=seed, **camera_options)
+    path.bind(sim)
+    eyeTracking.use_backend(sim)
+    eyeTracking.initialize_head()
+    wall_start = time.perf_counter()
+    eyeTracking.run_tracking_loop(eyeTracking.NECK_SERVO_PIN, duration=duration)
+    wall_time = time.perf_counter() - wall_start
+  finally:
+    eyeTracking.TRACKING_MODE = saved_mode
+  print(f"Simulated {duration:.1f} s ({game.frame} game frames) in {wall_time:.3f} s wall time "
+        f"({duration / wall_time:.0f}x real time)")
+  report = tracking_report(path)
+  if report is not None:
+    print(f"Pointing error {report['mean_error']:.2f} units mean, {report['p95_error']:.2f} p95, "
+          f"{report['max_error']:.2f} max; head lags the target by {report['latency'] * 1000:.0f} ms "
+          f"({report['lagged_error']:.2f} units rms once lined up)")
+  return report
+
+if __name__ == "__main__":
+  import sys
+
+  # "python gameCamera.py [duration] [pid|gaze|step] [render]"
+  arguments = sys.argv[1:]
+  render = "render" in arguments
+  modes = [a for a in arguments if a in ("pid", "gaze", "step")]
+  numbers = [float(a) for a in arguments if a.replace(".", "", 1).isdigit()]
+  run_game_tracking(numbers[0] if numbers else GAME_DURATION, mode=modes[0] if modes else None, render=render)
+  pygame.quit()
@@ -0,0 +1,70 @@
+
+from robotBackend import SERVO_LIMITS, servo_center, EYE_DIRECTION
+
+# --- Constants ---
+NECK_TAKEOVER_RATE = 1.5 # How fast (1/s) the neck moves to where the eyes are looking
+EYE_DIRECTION_SIGN = EYE_DIRECTION # Must match how the eye servos are mounted
+
+class GazeController:
+  """
+  Points the camera with the fast eye servos and the slow neck servos
+  together. Each axis pairs an eye port with a neck port (horizontal: D0 with
+  D2, vertical: D1 with D5) and all axes are updated in one pass per tick
+  from per-axis lists.
+
+  Given the object's direction in neck servo units, the neck moves towards it
+  at NECK_TAKEOVER_RATE, and each tick the eye is set to cover whatever the
+  neck has not reached yet (measured from the neck's estimated actual
+  position). The eyes therefore jump to the target straight away and drift
+  back to center as the neck takes over. Every command is clamped to the
+  port's README limits and to the optional narrower neck limits.
+  """
+  def __init__(self, mirror, eye_ports, neck_ports, neck_limits=None, takeover_rate=NECK_TAKEOVER_RATE):
+    self.mirror = mirror
+    self.takeover_rate = takeover_rate
+    self.eye_ports = list(eye_ports)
+    self.neck_ports = list(neck_ports)
+    self.eye_center = [servo_center(port) for port in self.eye_ports]
+    self.eye_min = [SERVO_LIMITS[port][0] for port in self.eye_ports]
+    self.eye_max = [SERVO_LIMITS[port][1] for port in self.eye_ports]
+    neck_limits = neck_limits or {}
+    self.neck_min = []
+    self.neck_max = []
+    for port in self.neck_ports:
+      min_pos, max_pos = SERVO_LIMITS[port]
+      limit_min, limit_max = neck_limits.get(port, (min_pos, max_pos))
+      self.neck_min.append(max(min_pos, limit_min))
+      self.neck_max.append(min(max_pos, limit_max))
+    self.reset()
+
+  def reset(self):
+    """Continue from wherever the necks currently are."""
+    self.neck_target = [None] * len(self.neck_ports)
+
+  def camera_directions(self):
+    """Where the camera points along each axis (neck plus eye offset), in neck servo units."""
+    mirror = self.mirror
+    return [mirror.get_position(neck) + EYE_DIRECTION_SIGN * (mirror.get_position(eye) - center)
+            for eye, neck, center in zip(self.eye_ports, self.neck_ports, self.eye_center)]
+
+  def update(self, directions, dt):
+    """
+    Move towards the object's direction on each axis (a list in axis order;
+    None leaves that axis where it is). Commands are queued on the mirror.
+    """
+    mirror = self.mirror
+    step = min(self.takeover_rate * dt, 1.0)
+    for i, direction in enumerate(directions):
+      if direction is None:
+        continue
+      neck_port = self.neck_ports[i]
+      neck_target = self.neck_target[i]
+      if neck_target is None:
+        neck_target = mirror.get_position(neck_port)
+      neck_target += (direction - neck_target) * step
+      neck_target = min(max(neck_target, self.neck_min[i]), self.neck_max[i])
+      self.neck_target[i] = neck_target
+      mirror.set_position(neck_port, neck_target)
+
+      eye = self.eye_center[i] + (direction - mirror.get_position(neck_port)) / EYE_DIRECTION_SIGN
+      mirror.set_position(self.eye_ports[i], min(max(eye, self.eye_min[i]), self.eye_max[i]))
@@ -0,0 +1,302 @@
+
+import math
+import random
+import time
+
+# --- Constants ---
+# Servo limits per port, taken from the README (sections 2 and 3).
+SERVO_LIMITS = {
+  "D0": (64, 126), # Eye X-Axis (horizontal)
+  "D1": (19, 64), # Eye Y-Axis (vertical)
+  "D2": (44, 110), # Head pivot (Neck-X)
+  "D3": (44, 110), # Right yaw piston
+  "D4": (49, 63), # Left yaw piston
+  "D5": (33, 166), # Inside neck piston (nodding)
+  "D6": (1, 180), # Jaw (no calibrated range yet, full ARC servo range)
+}
+SERVO_PORTS = tuple(SERVO_LIMITS)
+
+SERVO_FULL_RATE = 300.0 # Simulated travel in servo units per second at ARC speed 0 (fastest)
+CAMERA_WIDTH = 320 # Simulated camera frame size in pixels
+CAMERA_HEIGHT = 240
+CAMERA_FPS = 30 # Simulated camera frame rate
+CAMERA_LATENCY = 0.05 # Seconds between a frame being captured and its values being readable
+PIXELS_PER_UNIT = 5.0 # Pixels the object moves in the image per servo unit of head rotation
+EYE_DIRECTION = 1 # +1 if raising an eye servo turns the camera the same way as raising its neck servo
+
+def servo_center(port):
+  """Middle of a port's range (eyes look straight ahead here)."""
+  min_pos, max_pos = SERVO_LIMITS[port]
+  return (min_pos + max_pos) / 2
+
+# --- Backends ---
+# A backend gives the tracking code everything it used to take from ARC's globals:
+#   servo       an object with ARC's Servo methods (SetPosition, GetPosition, ...)
+#   get_var()   ARC's getVar
+#   monotonic() the current time in seconds
+#   sleep()     wait a number of seconds
+
+class ArcBackend:
+  """
+  The real robot. Wraps the globals ARC injects into a script (Servo, getVar
+  and the port constants D0..D6) so the same tracking code can run off-robot.
+  """
+  def __init__(self, servo, get_var, ports):
+    self.servo = ArcServo(servo, ports)
+    self.get_var = get_var
+
+  def monotonic(self):
+    return time.monotonic()
+
+  def sleep(self, seconds):
+    time.sleep(seconds)
+
+class ArcServo:
+  """ARC's Servo object addressed by port name ("D2") instead of ARC's port constants."""
+  def __init__(self, servo, ports):
+    self._servo = servo
+    self._ports = ports
+
+  def SetPosition(self, port, position):
+    self._servo.SetPosition(self._ports[port], position)
+
+  def GetPosition(self, port):
+    return self._servo.GetPosition(self._ports[port])
+
+  def Increment(self, port, step):
+    self._servo.Increment(self._ports[port], step)
+
+  def Decrement(self, port, step):
+    self._servo.Decrement(self._ports[port], step)
+
+  def SetSpeed(self, port, speed):
+    self._servo.SetSpeed(self._ports[port], speed)
+
+  def WaitForPositionEquals(self, port, position):
+    self._servo.WaitForPositionEquals(self._ports[port], position)
+
+class SimBackend:
+  """
+  A simulated robot on a virtual clock. sleep() advances the clock instantly,
+  so a tracking run goes as fast as the code allows, not in real time.
+  """
+  def __init__(self, camera_path, start_time=0.0, seed=None, **camera_options):
+    self.now = start_time
+    self.servo = SimServoController(self)
+    self.camera = SimCamera(self, camera_path, seed=seed, **camera_options)
+
+  def get_var(self, name):
+    return self.camera.get_var(name)
+
+  def monotonic(self):
+    return self.now
+
+  def sleep(self, seconds):
+    if seconds > 0:
+      self.now += seconds
+
+class SimServo:
+  """
+  One simulated servo. Moves towards its commanded position at a rate set by
+  its ARC speed and never leaves its port's limits; commands outside the
+  limits are clamped and counted in limit_violations.
+  """
+  def __init__(self, port, position):
+    self.port = port
+    self.min_pos, self.max_pos = SERVO_LIMITS[port]
+    self.speed = 0
+    self.target = self._clamp(position)
+    self.start_pos = self.target
+    self.start_time = 0.0
+    self.limit_violations = 0
+
+  def _clamp(self, position):
+    return min(max(position, self.min_pos), self.max_pos)
+
+  def rate(self):
+    """Travel rate in units per second for the current ARC speed (0 fastest, 10 slowest)."""
+    return SERVO_FULL_RATE / (1 + self.speed)
+
+  def position(self, now):
+    """Where the servo actually is at time now."""
+    travel = self.rate() * (now - self.start_time)
+    distance = self.target - self.start_pos
+    if abs(distance) <= travel:
+      return self.target
+    return self.start_pos + math.copysign(travel, distance)
+
+  def travel_time(self, now):
+    """Seconds until the servo reaches its commanded position."""
+    return abs(self.target - self.position(now)) / self.rate()
+
+  def command(self, position, now):
+    if position < self.min_pos or position > self.max_pos:
+      self.limit_violations += 1
+    self.start_pos = self.position(now)
+    self.start_time = now
+    self.target = self._clamp(position)
+
+class SimServoController:
+  """Stands in for ARC's Servo object, with one SimServo per README port."""
+  def __init__(self, backend, start_positions=None):
+    self.backend = backend
+    start_positions = start_positions or {}
+    self.servos = {}
+    for port in SERVO_PORTS:
+      self.servos[port] = SimServo(port, start_positions.get(port, servo_center(port)))
+
+  def SetPosition(self, port, position):
+    self.servos[port].command(position, self.backend.now)
+
+  def GetPosition(self, port):
+    return int(round(self.servos[port].position(self.backend.now)))
+
+  def Increment(self, port, step):
+    servo = self.servos[port]
+    servo.command(servo.target + step, self.backend.now)
+
+  def Decrement(self, port, step):
+    servo = self.servos[port]
+    servo.command(servo.target - step, self.backend.now)
+
+  def SetSpeed(self, port, speed):
+    servo = self.servos[port]
+    servo.command(servo.target, self.backend.now) # Keep the current move continuous
+    servo.speed = speed
+
+  def WaitForPositionEquals(self, port, position):
+    servo = self.servos[port]
+    if servo.target != servo._clamp(position):
+      return # Would never arrive; ARC would block forever
+    self.backend.sleep(servo.travel_time(self.backend.now))
+
+class SimCamera:
+  """
+  The simulated left-eye camera. The object follows a path: a function of time
+  returning its direction in servo units, (x, y) for both axes, or None when
+  it is out of sight. The image position depends on where the head and the
+  eye point (an eye turned away from its center adds to the neck). Frames
+  arrive at CAMERA_FPS and are readable CAMERA_LATENCY seconds later.
+  dropout_rate is the chance that a tracked frame has no center value.
+  """
+  def __init__(self, backend, path, pan_port="D2", tilt_port="D5", eye_x_port="D0", eye_y_port="D1",
+               fps=CAMERA_FPS, latency=CAMERA_LATENCY, pixels_per_unit=PIXELS_PER_UNIT, noise=0.0,
+               dropout_rate=0.0, seed=None):
+    self.backend = backend
+    self.path = path
+    self.pan_port = pan_port
+    self.tilt_port = tilt_port
+    self.eye_x_port = eye_x_port
+    self.eye_y_port = eye_y_port
+    self.fps = fps
+    self.latency = latency
+    self.pixels_per_unit = pixels_per_unit
+    self.noise = noise
+    self.dropout_rate = dropout_rate
+    self.random = random.Random(seed)
+    self.frames = [] # Captured, not yet readable frames: (ready_time, tracking, x, y)
+    self.current = (False, None, None)
+    self.last_frame = -1
+
+  def _capture(self, now):
+    """Capture the frame for time now: where the object appears given the head position."""
+    target = self.path(now)
+    if target is None:
+      return (False, None, None)
+    if not isinstance(target, tuple):
+      target = (target, None)
+    x = CAMERA_WIDTH / 2 + (self.direction(self.pan_port, self.eye_x_port, now) - target[0]) * self.pixels_per_unit
+    y = CAMERA_HEIGHT / 2
+    if target[1] is not None:
+      y += (self.direction(self.tilt_port, self.eye_y_port, now) - target[1]) * self.pixels_per_unit
+    if not (0 <= x < CAMERA_WIDTH and 0 <= y < CAMERA_HEIGHT):
+      return (False, None, None) # Out of the field of view
+    if self.random.random() < self.dropout_rate:
+      return (True, None, None)
+    if self.noise:
+      x += self.random.gauss(0, self.noise)
+      y += self.random.gauss(0, self.noise)
+    return (True, int(round(x)), int(round(y)))
+
+  def direction(self, neck_port, eye_port, now):
+    """Where the camera points along one axis, in neck servo units."""
+    servos = self.backend.servo.servos
+    eye_offset = servos[eye_port].position(now) - servo_center(eye_port)
+    return servos[neck_port].position(now) + EYE_DIRECTION * eye_offset
+
+  def _advance(self, now):
+    frame = int(now * self.fps)
+    if frame != self.last_frame:
+      self.last_frame = frame
+      self.frames.append((now + self.latency,) + self._capture(now))
+    while self.frames and self.frames[0][0] <= now:
+      self.current = self.frames.pop(0)[1:]
+
+  def get_var(self, name):
+    self._advance(self.backend.now)
+    tracking, x, y = self.current
+    if name == "$CameraIsTracking":
+      return tracking
+    if name == "$CameraObjectCenterX":
+      return x if tracking else None
+    if name == "$CameraObjectCenterY":
+      return y if tracking else None
+    return None
+
+# --- Object Paths ---
+# Paths give the object's direction in servo units (the neck position that
+# would center it) at time t, or None while the object is out of sight.
+
+def still_path(position):
+  return lambda t: position
+
+def step_path(before, after, step_time):
+  return lambda t: before if t < step_time else after
+
+def sine_path(center, amplitude, period):
+  return lambda t: center + amplitude * math.sin(2 * math.pi * t / period)
+
+def path_2d(path_x, path_y):
+  """Combine a horizontal and a vertical path (vertical in nodding servo units)."""
+  def path(t):
+    x, y = path_x(t), path_y(t)
+    return None if x is None or y is None else (x, y)
+  return path
+
+def recorded_path(samples):
+  """
+  A path replaying recorded (time, position) samples with linear
+  interpolation. A position of None marks a dropout.
+  """
+  samples = sorted(samples, key=lambda sample: sample[0]) # By time only: a dropout is None
+  times = [t for t, _ in samples]
+
+  def path(t):
+    if t <= times[0]:
+      return samples[0][1]
+    if t >= times[-1]:
+      return samples[-1][1]
+    low, high = 0, len(times) - 1
+    while high - low > 1:
+      middle = (low + high) // 2
+      if times[middle] <= t:
+        low = middle
+      else:
+        high = middle
+    (t0, p0), (t1, p1) = samples[low], samples[high]
+    if p0 is None or p1 is None:
+      return None
+    return p0 + (p1 - p0) * (t - t0) / (t1 - t0)
+  return path
+
+def load_path(filename):
+  """Load a recorded path from a CSV file of "time,position" lines (empty position = dropout)."""
+  samples = []
+  with open(filename) as f:
+    for line in f:
+      line = line.strip()
+      if not line or line.startswith("#") or line[0].isalpha():
+        continue # Skip blanks, comments and a header
+      t, position = (line.split(",") + [""])[:2]
+      samples.append((float(t), float(position) if position.strip() else None))
+  return recorded_path(samples)
@@ -0,0 +1,134 @@
+
+from robotBackend import SERVO_LIMITS, SERVO_PORTS
+
+# --- Constants ---
+RESYNC_INTERVAL = 2.0 # Seconds between hardware position reads for a port
+DRIFT_TOLERANCE = 2 # Servo units the estimate may differ from the hardware before it counts as drift
+MIRROR_FULL_RATE = 300.0 # Servo units per second a servo travels at ARC speed 0; measure on the robot (travel at speed s is this / (1 + s))
+
+class ServoMirror:
+  """
+  Local mirror of every servo's state, so the control loop does not need a
+  Servo.GetPosition round trip per frame and sends at most one command per
+  servo per tick.
+
+  For each port the mirror keeps the commanded position and an estimated
+  actual position (travelling towards the command at full_rate / (1 + speed)). A
+  port is re-read from the hardware every resync_interval seconds, or on the
+  next access after request_sync(); a read that disagrees with the estimate
+  by more than drift_tolerance counts as drift and makes that port re-read
+  again on its next access.
+
+  Commands issued during a tick (set_position, increment, decrement) are
+  merged into a pending absolute target per port; flush() sends one
+  SetPosition for each port whose target changed.
+  """
+  def __init__(self, servo, clock, ports=SERVO_PORTS, resync_interval=RESYNC_INTERVAL,
+               drift_tolerance=DRIFT_TOLERANCE, full_rate=MIRROR_FULL_RATE):
+    self.servo = servo
+    self.full_rate = full_rate
+    self.clock = clock
+    self.resync_interval = resync_interval
+    self.drift_tolerance = drift_tolerance
+    self.commanded = {}
+    self.estimated = {}
+    self.estimated_at = {}
+    self.speed = {}
+    self.next_sync = {}
+    self.pending = {}
+    self.reset_counters()
+    for port in ports:
+      self.speed[port] = 0
+      self.sync(port)
+      self.commanded[port] = self.estimated[port]
+
+  def reset_counters(self):
+    self.reads = 0
+    self.commands_sent = 0
+    self.commands_merged = 0
+    self.drift_events = 0
+
+  def sync(self, port):
+    """Read the port's position from the hardware and correct the estimate."""
+    now = self.clock()
+    measured = self.servo.GetPosition(port)
+    self.reads += 1
+    if port in self.estimated:
+      if abs(measured - self._estimate(port, now)) > self.drift_tolerance:
+        self.drift_events += 1
+        self.next_sync[port] = now # Drifted: check again on the next access
+      else:
+        self.next_sync[port] = now + self.resync_interval
+    else:
+      self.next_sync[port] = now + self.resync_interval
+    self.estimated[port] = measured
+    self.estimated_at[port] = now
+    return measured
+
+  def request_sync(self, port):
+    """Re-read the port from the hardware on its next access (e.g. after an external move)."""
+    self.next_sync[port] = self.clock()
+
+  def _estimate(self, port, now):
+    position = self.estimated[port]
+    target = self.commanded[port]
+    travel = self.full_rate / (1 + self.speed[port]) * (now - self.estimated_at[port])
+    if abs(target - position) <= travel:
+      return target
+    return position + travel if target > position else position - travel
+
+  def get_position(self, port):
+    """Estimated current position, re-read from the hardware only when due."""
+    now = self.clock()
+    if now >= self.next_sync[port]:
+      return self.sync(port)
+    position = self._estimate(port, now)
+    self.estimated[port] = position
+    self.estimated_at[port] = now
+    return int(round(position))
+
+  def target(self, port):
+    """The position the port will be commanded to at the next flush()."""
+    return self.pending.get(port, self.commanded[port])
+
+  def set_position(self, port, position):
+    """Queue an absolute move, clamped to the port's limits; sent by flush()."""
+    min_pos, max_pos = SERVO_LIMITS[port]
+    if port in self.pending:
+      self.commands_merged += 1
+    self.pending[port] = min(max(position, min_pos), max_pos)
+
+  def increment(self, port, step):
+    self.set_position(port, self.target(port) + step)
+
+  def decrement(self, port, step):
+    self.set_position(port, self.target(port) - step)
+
+  def set_speed(self, port, speed):
+    """Set the servo speed immediately (ARC speed: 0 fastest, 10 slowest)."""
+    self.get_position(port) # Bring the estimate up to date at the old speed
+    self.servo.SetSpeed(port, speed)
+    self.speed[port] = speed
+
+  def flush(self):
+    """Send the merged commands of this tick: one SetPosition per changed port."""
+    now = self.clock()
+    sent = 0
+    for port, position in self.pending.items():
+      position = int(round(position))
+      if position == self.commanded[port]:
+        continue
+      self.estimated[port] = self._estimate(port, now)
+      self.estimated_at[port] = now
+      self.servo.SetPosition(port, position)
+      self.commanded[port] = position
+      sent += 1
+    self.pending.clear()
+    self.commands_sent += sent
+    return sent
+
+  def report(self):
+    """Print a one-line summary of the servo traffic and reset the counters."""
+    print(f"Servos: {self.commands_sent} commands sent, {self.commands_merged} merged, "
+          f"{self.reads} position reads, {self.drift_events} drift events")
+    self.reset_counters()
@@ -0,0 +1,100 @@
+
+from collections import deque
+
+class AlphaBetaFilter:
+  """
+  Alpha-beta filter for one coordinate. Estimates position and velocity from
+  noisy measurements taken at irregular times and extrapolates the estimate
+  forwards. After max_coast seconds without a measurement it gives up.
+  """
+  def __init__(self, alpha, beta, max_coast):
+    self.alpha = alpha
+    self.beta = beta
+    self.max_coast = max_coast
+    self.reset()
+
+  def reset(self):
+    self.position = None
+    self.velocity = 0.0
+    self.time = None
+
+  def update(self, measurement, t):
+    """Blend a measurement taken at time t into the estimate."""
+    if self.position is None:
+      self.position = measurement
+      self.velocity = 0.0
+      self.time = t
+      return
+    dt = t - self.time
+    if dt <= 0:
+      self.position += self.alpha * (measurement - self.position)
+      return
+    predicted = self.position + self.velocity * dt
+    residual = measurement - predicted
+    self.position = predicted + self.alpha * residual
+    self.velocity += self.beta * residual / dt
+    self.time = t
+
+  def predict(self, t):
+    """Estimated position at time t, or None if there is no recent enough estimate."""
+    if self.position is None or t - self.time > self.max_coast:
+      return None
+    return self.position + self.velocity * (t - self.time)
+
+class TargetPredictor:
+  """
+  Filters one camera axis of the tracked object and predicts where it will
+  be when the servo gets there.
+
+  The camera moves with the servo, so pixel positions are first turned into
+  the object's direction in servo units (servo position plus pixel offset
+  divided by pixels_per_unit). A frame read at time now was captured
+  latency seconds earlier, so it is paired with the servo position recorded
+  closest to that moment. The filtered direction is extrapolated lead
+  seconds past now and turned back into a pixel position relative to the
+  servo's current position, which the neck controllers use unchanged.
+  Without a measurement (a dropout) the estimate coasts on its velocity.
+  """
+  def __init__(self, center, pixels_per_unit, latency, lead, alpha, beta, max_coast):
+    self.center = center
+    self.pixels_per_unit = pixels_per_unit
+    self.latency = latency
+    self.lead = lead
+    self.filter = AlphaBetaFilter(alpha, beta, max_coast)
+    self.history = deque(maxlen=32) # Recent (time, servo position) pairs
+
+  def reset(self):
+    self.filter.reset()
+    self.history.clear()
+
+  def _servo_pos_at(self, t):
+    """The recorded servo position at or just before time t (the oldest one if none is that old)."""
+    position = self.history[0][1]
+    for recorded_time, recorded_pos in self.history:
+      if recorded_time > t:
+        break
+      position = recorded_pos
+    return position
+
+  def _to_pixels(self, direction, servo_pos):
+    # An object right of center (larger pixel value) sits at a lower servo position
+    return self.center + (servo_pos - direction) * self.pixels_per_unit
+
+  def update(self, pixel, servo_pos, now):
+    """Add a camera measurement; returns the predicted pixel position."""
+    self.history.append((now, servo_pos))
+    captured_pos = self._servo_pos_at(now - self.latency)
+    direction = captured_pos - (pixel - self.center) / self.pixels_per_unit
+    self.filter.update(direction, now - self.latency)
+    return self._to_pixels(self.filter.predict(now + self.lead), servo_pos)
+
+  def direction(self, now):
+    """Predicted direction of the object in servo units, or None without a recent estimate."""
+    return self.filter.predict(now + self.lead)
+
+  def coast(self, servo_pos, now):
+    """Predicted pixel position without a new measurement, or None once coasted too long."""
+    direction = self.filter.predict(now + self.lead)
+    if direction is None:
+      return None
+    return self._to_pixels(direction, servo_pos)
@@ -0,0 +1,112 @@
+
+import mmap
+import struct
+from array import array
+
+# --- Constants ---
+# "estimated" is the ServoMirror's model of where the servo is, not a position read back from it.
+TELEMETRY_FIELDS = ("timestamp", "delta", "commanded", "estimated", "loop_time")
+TELEMETRY_MAGIC = b"TLM1"
+# File layout: magic, field count, record count, then the records oldest first,
+# each one little-endian float64 per field (in TELEMETRY_FIELDS order).
+HEADER_FORMAT = "<4sII"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+class TelemetryBuffer:
+  """
+  Fixed-capacity ring buffer of per-tick tracking telemetry. All storage is
+  allocated up front in one flat array of doubles, so record() costs the
+  same few stores whatever has been logged; once full, the oldest records
+  are overwritten. dump() writes the records to a binary file through a
+  memory map, and load_telemetry() reads it back as NumPy arrays.
+  """
+  def __init__(self, capacity):
+    self.capacity = capacity
+    self.width = len(TELEMETRY_FIELDS)
+    self.data = array("d", bytes(8 * capacity * self.width))
+    self.clear()
+
+  def clear(self):
+    self.next_index = 0
+    self.count = 0
+
+  def record(self, timestamp, delta, commanded, estimated, loop_time):
+    """Store one tick (use math.nan for a value that has no reading this tick)."""
+    data = self.data
+    i = self.next_index * self.width
+    data[i] = timestamp
+    data[i + 1] = delta
+    data[i + 2] = commanded
+    data[i + 3] = estimated
+    data[i + 4] = loop_time
+    self.next_index += 1
+    if self.next_index == self.capacity:
+      self.next_index = 0
+    if self.count < self.capacity:
+      self.count += 1
+
+  def _chronological(self):
+    """The stored records oldest first, as raw bytes."""
+    raw = memoryview(self.data).cast("B")
+    record_size = 8 * self.width
+    if self.count < self.capacity:
+      return [raw[:self.count * record_size]]
+    split = self.next_index * record_size
+    return [raw[split:], raw[:split]]
+
+  def dump(self, filename):
+    """Write the buffer to filename; returns the number of records written."""
+    size = HEADER_SIZE + self.count * 8 * self.width
+    with open(filename, "w+b") as f:
+      f.truncate(size)
+      with mmap.mmap(f.fileno(), size) as mapped:
+        struct.pack_into(HEADER_FORMAT, mapped, 0, TELEMETRY_MAGIC, self.width, self.count)
+        offset = HEADER_SIZE
+        for chunk in self._chronological():
+          mapped[offset:offset + len(chunk)] = chunk
+          offset += len(chunk)
+    return self.count
+
+def load_telemetry(filename):
+  """
+  Load a dumped telemetry file as a dict of NumPy arrays, one per field.
+  The arrays are views on a read-only memory map of the file.
+  """
+  import numpy as np
+
+  with open(filename, "rb") as f:
+    magic, width, count = struct.unpack(HEADER_FORMAT, f.read(HEADER_SIZE))
+  if magic != TELEMETRY_MAGIC or width != len(TELEMETRY_FIELDS):
+    raise ValueError(f"{filename} is not a telemetry file with fields {TELEMETRY_FIELDS}")
+  dtype = np.dtype([(name, "<f8") for name in TELEMETRY_FIELDS])
+  if count == 0:
+    records = np.zeros(0, dtype=dtype)
+  else:
+    records = np.memmap(filename, dtype=dtype, mode="r", offset=HEADER_SIZE, shape=(count,))
+  return {name: records[name] for name in TELEMETRY_FIELDS}
+
+def summarize(telemetry):
+  """Short text summary of loaded telemetry (tick count, error, servo lag and loop time statistics)."""
+  import numpy as np
+
+  delta = telemetry["delta"]
+  tracked = delta[~np.isnan(delta)]
+  loop_ms = telemetry["loop_time"] * 1000
+  lines = [f"{len(delta)} ticks over {telemetry['timestamp'][-1] - telemetry['timestamp'][0]:.1f} s"
+           if len(delta) else "0 ticks"]
+  if len(tracked):
+    lines.append(f"tracked {len(tracked)} ticks, mean |delta| {np.abs(tracked).mean():.1f} px, "
+                 f"max |delta| {np.abs(tracked).max():.1f} px")
+  if len(delta):
+    lag = np.abs(telemetry["commanded"] - telemetry["estimated"])
+    lines.append(f"estimated servo lag behind command: mean {lag.mean():.2f}, max {lag.max():.2f} units")
+  if len(loop_ms):
+    lines.append(f"loop time p50 {np.percentile(loop_ms, 50):.3f} ms, p99 {np.percentile(loop_ms, 99):.3f} ms")
+  return "\n".join(lines)
+
+if __name__ == "__main__":
+  import sys
+
+  for filename in sys.argv[1:]:
+    print(filename)
+    print(summarize(load_telemetry(filename)))
@@ -0,0 +1,157 @@
+
+import math
+
+from robotBackend import SERVO_LIMITS
+
+# --- Constants ---
+RIGHT_YAW_PIN = "D3" # Right yaw piston (master)
+LEFT_YAW_PIN = "D4" # Left yaw piston (slave)
+# Measured (D3, D4) pairs that hold the head without binding, from one end of the
+# right piston's range to the other. The default is the README ranges mapped
+# linearly in opposite directions; re-measure before relying on it.
+YAW_CALIBRATION = ((44, 63), (110, 49))
+YAW_TABLE_STEP = 0.1 # Resolution of the D3 -> D4 lookup table in servo units
+YAW_MAX_VELOCITY = 40.0 # Fastest D3 travel in servo units per second
+YAW_MAX_ACCELERATION = 120.0 # Fastest D3 change of velocity in servo units per second squared
+YAW_PROFILE = "s-curve" # "trapezoid" or "s-curve"
+
+S_CURVE_SAMPLES = 512 # Points in the precomputed S-curve shape
+
+def _min_jerk(fraction):
+  return fraction ** 3 * (10 - 15 * fraction + 6 * fraction ** 2)
+
+# Normalised S-curve (minimum-jerk) shape: progress 0..1 over time 0..1.
+S_CURVE = [_min_jerk(i / (S_CURVE_SAMPLES - 1)) for i in range(S_CURVE_SAMPLES)]
+S_CURVE_PEAK_VELOCITY = 1.875 # Peak of the shape's slope
+S_CURVE_PEAK_ACCELERATION = 10 / math.sqrt(3) # Peak of the shape's second derivative
+
+class YawMap:
+  """
+  Calibrated mapping from the right yaw piston (D3) to the left one (D4),
+  precomputed as a table every YAW_TABLE_STEP units over D3's range so a
+  lookup is one index calculation. Refuses a calibration that would send
+  either piston past its README limits.
+  """
+  def __init__(self, calibration=YAW_CALIBRATION, step=YAW_TABLE_STEP,
+               master=RIGHT_YAW_PIN, slave=LEFT_YAW_PIN):
+    points = sorted(calibration)
+    if len(points) < 2:
+      raise ValueError("Yaw calibration needs at least two (D3, D4) points")
+    self.master_min, self.master_max = points[0][0], points[-1][0]
+    self.step = step
+    for port, values in ((master, [p[0] for p in points]), (slave, [p[1] for p in points])):
+      min_pos, max_pos = SERVO_LIMITS[port]
+      if min(values) < min_pos or max(values) > max_pos:
+        raise ValueError(f"Yaw calibration leaves {port}'s limits {min_pos}-{max_pos}")
+
+    count = int(round((self.master_max - self.master_min) / step)) + 1
+    self.table = []
+    segment = 0
+    for i in range(count):
+      master_pos = min(self.master_min + i * step, self.master_max)
+      while points[segment + 1][0] < master_pos:
+        segment += 1
+      (m0, s0), (m1, s1) = points[segment], points[segment + 1]
+      self.table.append(s0 + (s1 - s0) * (master_pos - m0) / (m1 - m0))
+
+  def slave_position(self, master_pos):
+    """D4 position that goes with a D3 position (which must be in the calibrated range)."""
+    return self.table[int((master_pos - self.master_min) / self.step + 0.5)]
+
+class YawPlanner:
+  """
+  Plans coupled moves of the two yaw pistons and streams them at the control
+  rate. plan() turns a goal for D3 into a list of synchronised (D3, D4)
+  setpoints, one per control tick, following a trapezoidal or S-curve
+  velocity profile; D4 comes from the YawMap. tick() then only takes the
+  next pair from the list. A goal outside the calibrated range, or a plan
+  whose setpoints would leave a piston's limits, raises ValueError.
+  """
+  def __init__(self, mirror, yaw_map, period, max_velocity=YAW_MAX_VELOCITY,
+               max_acceleration=YAW_MAX_ACCELERATION, profile=YAW_PROFILE,
+               master=RIGHT_YAW_PIN, slave=LEFT_YAW_PIN):
+    self.mirror = mirror
+    self.yaw_map = yaw_map
+    self.period = period
+    self.max_velocity = max_velocity
+    self.max_acceleration = max_acceleration
+    self.profile = profile
+    self.master = master
+    self.slave = slave
+    self.setpoints = []
+    self.index = 0
+
+  def moving(self):
+    return self.index < len(self.setpoints)
+
+  def _progress(self, distance):
+    """Fraction of the move completed at each control tick."""
+    if distance == 0:
+      return [1.0]
+    if self.profile == "s-curve":
+      duration = max(S_CURVE_PEAK_VELOCITY * distance / self.max_velocity,
+                     math.sqrt(S_CURVE_PEAK_ACCELERATION * distance / self.max_acceleration))
+      ticks = max(1, int(math.ceil(duration / self.period)))
+      last = S_CURVE_SAMPLES - 1
+      return [S_CURVE[(i * last) // ticks] for i in range(1, ticks + 1)]
+    if self.profile == "trapezoid":
+      accel_time = self.max_velocity / self.max_acceleration
+      if distance < self.max_velocity * accel_time:
+        # Never reaches full speed: triangular profile
+        accel_time = math.sqrt(distance / self.max_acceleration)
+        cruise_time = 0.0
+      else:
+        cruise_time = distance / self.max_velocity - accel_time
+      peak = self.max_acceleration * accel_time
+      duration = 2 * accel_time + cruise_time
+      ticks = max(1, int(math.ceil(duration / self.period)))
+      progress = []
+      for i in range(1, ticks + 1):
+        t = min(i * self.period, duration)
+        if t < accel_time:
+          travelled = 0.5 * self.max_acceleration * t * t
+        elif t < accel_time + cruise_time:
+          travelled = 0.5 * peak * accel_time + peak * (t - accel_time)
+        else:
+          remaining = duration - t
+          travelled = distance - 0.5 * self.max_acceleration * remaining * remaining
+        progress.append(travelled / distance)
+      return progress
+    raise ValueError(f"Unknown yaw profile '{self.profile}'")
+
+  def plan(self, goal, start=None):
+    """Synchronised (D3, D4) setpoints moving D3 from start (default: where it is) to goal."""
+    yaw_map = self.yaw_map
+    if not yaw_map.master_min <= goal <= yaw_map.master_max:
+      raise ValueError(f"Yaw goal {goal} is outside the calibrated range "
+                       f"{yaw_map.master_min}-{yaw_map.master_max}")
+    if start is None:
+      start = self.setpoints[self.index - 1][0] if self.moving() and self.index else self.mirror.target(self.master)
+    start = min(max(start, yaw_map.master_min), yaw_map.master_max)
+
+    setpoints = []
+    for fraction in self._progress(abs(goal - start)):
+      master_pos = start + (goal - start) * fraction
+      setpoints.append((master_pos, yaw_map.slave_position(master_pos)))
+    for port, values in ((self.master, [p[0] for p in setpoints]), (self.slave, [p[1] for p in setpoints])):
+      min_pos, max_pos = SERVO_LIMITS[port]
+      if min(values) < min_pos or max(values) > max_pos:
+        raise ValueError(f"Yaw plan leaves {port}'s limits {min_pos}-{max_pos}")
+    return setpoints
+
+  def start(self, goal):
+    """Plan a move to goal and start streaming it (replacing any move in progress)."""
+    setpoints = self.plan(goal)
+    self.setpoints = setpoints
+    self.index = 0
+    return len(setpoints)
+
+  def tick(self):
+    """Queue this tick's setpoints on the mirror; returns False when no move is in progress."""
+    if self.index >= len(self.setpoints):
+      return False
+    master_pos, slave_pos = self.setpoints[self.index]
+    self.index += 1
+    self.mirror.set_position(self.master, master_pos)
+    self.mirror.set_position(self.slave, slave_pos)
+    return True